@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
 import json
@@ -17,7 +17,10 @@ warnings.filterwarnings('ignore', message='.*MPS.*')
 
 # Import our AI processing modules
 from document_processor import DocumentProcessor
-from enhanced_ocr import get_ocr_service
+from enhanced_ocr import get_ocr_service, Deadline, OCR_MODES, PREPROCESSING_PROFILES
+from ocr_pool import get_ocr_pool
+from job_queue import get_job_queue, validate_callback_url
+from ocr_words import json_default, words_json
 
 # Create a proper lightweight grievance analyzer
 class LightweightGrievanceAnalyzer:
@@ -102,7 +105,14 @@ ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx'}
 # Initialize services
 document_processor = DocumentProcessor()
 grievance_analyzer = LightweightGrievanceAnalyzer()
-ocr_service = get_ocr_service()
+# OCR requests go to the worker pool when OCR_WORKERS is set
+ocr_service = get_ocr_pool() or get_ocr_service()
+
+# Handlers for queued jobs: fn(file_path, options) -> result
+JOB_HANDLERS = {
+    'document': lambda filepath, options: document_processor.analyze_document(filepath),
+    'ocr': lambda filepath, options: ocr_service.extract_text(filepath, options.get('mode'), options.get('profile'))
+}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -149,10 +159,11 @@ def rate_limit(max_requests=10, per_seconds=60):
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, answered as soon as the process is up"""
     ocr_status = ocr_service.get_service_status()
     return jsonify({
         "status": "healthy",
+        "ready": ocr_status["engines_ready"],
         "timestamp": datetime.now().isoformat(),
         "services": {
             "document_processor": "available",
@@ -161,6 +172,20 @@ def health_check():
         }
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint, 503 until the OCR engines have finished loading"""
+    # The document processor runs its OCR on the same service, so one flag covers both
+    ready = get_ocr_service().ready.is_set()
+    return jsonify({
+        "status": "ready" if ready else "starting",
+        "timestamp": datetime.now().isoformat(),
+        "services": {
+            "ocr_service": ready,
+            "document_processor": ready
+        }
+    }), 200 if ready else 503
+
 @app.route('/api/ocr/status', methods=['GET'])
 def get_ocr_status():
     """Get OCR service status"""
@@ -178,42 +203,95 @@ def get_ocr_status():
             "error": str(e)
         }), 500
 
+def save_ocr_upload():
+    """Validate and save an OCR upload, returning (upload, error_response)"""
+    if 'file' not in request.files:
+        return None, (jsonify({
+            "success": False,
+            "error": "No file uploaded"
+        }), 400)
+    
+    file = request.files['file']
+    if file.filename == '' or file.filename is None:
+        return None, (jsonify({
+            "success": False,
+            "error": "No file selected"
+        }), 400)
+    
+    if not allowed_file(file.filename):
+        return None, (jsonify({
+            "success": False,
+            "error": f"File type not supported"
+        }), 400)
+    
+    mode, profile, error = read_ocr_options()
+    if error:
+        return None, error
+    
+    filepath = save_upload(file)
+    return {"file_name": file.filename, "filepath": filepath, "mode": mode, "profile": profile}, None
+
+def read_ocr_options():
+    """Validate the OCR mode and preprocessing profile form fields"""
+    mode = request.form.get('mode')
+    if mode and mode not in OCR_MODES:
+        return None, None, (jsonify({
+            "success": False,
+            "error": f"Unknown OCR mode: {mode}"
+        }), 400)
+    
+    profile = request.form.get('profile')
+    if profile and profile not in PREPROCESSING_PROFILES:
+        return None, None, (jsonify({
+            "success": False,
+            "error": f"Unknown preprocessing profile: {profile}"
+        }), 400)
+    
+    return mode, profile, None
+
+def read_deadline():
+    """Request deadline from the X-Deadline-Ms header or deadline_ms field, returning (deadline, error_response)"""
+    value = request.headers.get('X-Deadline-Ms') or request.values.get('deadline_ms')
+    if not value:
+        return None, None
+    try:
+        milliseconds = float(value)
+    except ValueError:
+        milliseconds = 0
+    if milliseconds <= 0:
+        return None, (jsonify({
+            "success": False,
+            "error": f"Invalid deadline: {value}"
+        }), 400)
+    return Deadline(milliseconds / 1000.0), None
+
+def save_upload(file, prefix=''):
+    """Save an uploaded file under a timestamped secure name"""
+    filename = secure_filename(file.filename)
+    timestamp = str(int(time.time()))
+    filename = f"{timestamp}_{prefix}{filename}"
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(filepath)
+    return filepath
+
 @app.route('/api/ocr/extract', methods=['POST'])
 @rate_limit(max_requests=20, per_seconds=300)
 def extract_text():
     """Extract text from uploaded file using OCR"""
     try:
-        if 'file' not in request.files:
-            return jsonify({
-                "success": False,
-                "error": "No file uploaded"
-            }), 400
-        
-        file = request.files['file']
-        if file.filename == '' or file.filename is None:
-            return jsonify({
-                "success": False,
-                "error": "No file selected"
-            }), 400
-        
-        if not allowed_file(file.filename):
-            return jsonify({
-                "success": False,
-                "error": f"File type not supported"
-            }), 400
-        
-        # Save file securely
-        filename = secure_filename(file.filename)
-        timestamp = str(int(time.time()))
-        filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        deadline, error = read_deadline()
+        if error:
+            return error
+        upload, error = save_ocr_upload()
+        if error:
+            return error
+        filepath = upload["filepath"]
         
         # Extract text using OCR service
-        logger.info(f"Extracting text from: {filename}")
+        logger.info(f"Extracting text from: {os.path.basename(filepath)}")
         start_time = time.time()
         
-        ocr_result = ocr_service.extract_text(filepath)
+        ocr_result = ocr_service.extract_text(filepath, upload["mode"], upload["profile"], deadline=deadline)
         processing_time = time.time() - start_time
         
         # Clean up uploaded file
@@ -222,68 +300,165 @@ def extract_text():
         except:
             pass
         
+        data = {
+            "text": ocr_result.get("text", ""),
+            "confidence": ocr_result.get("confidence", 0.0),
+            "engine": ocr_result.get("best_engine", "unknown"),
+            "cascade": ocr_result.get("cascade"),
+            "preprocessing": ocr_result.get("preprocessing"),
+            "skipped_stages": ocr_result.get("skipped_stages", []),
+            "processing_time": round(processing_time, 2),
+            "file_name": upload["file_name"],
+            "extracted_at": datetime.now().isoformat()
+        }
+        # Word boxes on request, as columns whose spans index into "text"
+        if request.values.get('words') in ('1', 'true'):
+            best_result = ocr_result.get("all_results", {}).get(ocr_result.get("best_engine"), {})
+            data["words"] = words_json(best_result.get("details"))
+        
+        return jsonify({
+            "success": True,
+            "data": data
+        })
+        
+    except Exception as e:
+        logger.error(f"OCR extraction error: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/ocr/extract/batch', methods=['POST'])
+@rate_limit(max_requests=5, per_seconds=300)
+def extract_text_batch():
+    """Extract text from several uploaded files in one request"""
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({
+            "success": False,
+            "error": "No files uploaded"
+        }), 400
+    
+    unsupported = [file.filename for file in files if not allowed_file(file.filename)]
+    if unsupported:
+        return jsonify({
+            "success": False,
+            "error": f"File type not supported: {', '.join(unsupported)}"
+        }), 400
+    
+    mode, profile, error = read_ocr_options()
+    if error:
+        return error
+    
+    filepaths = []
+    try:
+        for index, file in enumerate(files):
+            # Batch uploads share a timestamp, so number them to keep their names apart
+            filepaths.append(save_upload(file, prefix=f"{index}_"))
+        
+        logger.info(f"Extracting text from a batch of {len(filepaths)} files")
+        start_time = time.time()
+        ocr_results = ocr_service.extract_text_batch(filepaths, mode, profile)
+        processing_time = time.time() - start_time
+        
         return jsonify({
             "success": True,
             "data": {
-                "text": ocr_result.get("text", ""),
-                "confidence": ocr_result.get("confidence", 0.0),
-                "engine": ocr_result.get("best_engine", "unknown"),
+                "results": [{
+                    "file_name": file.filename,
+                    "text": result.get("text", result.get("total_text", "")),
+                    "confidence": result.get("confidence", result.get("total_confidence", 0.0)),
+                    "engine": result.get("best_engine", result.get("extraction_method", "unknown")),
+                    "error": result.get("error")
+                } for file, result in zip(files, ocr_results)],
                 "processing_time": round(processing_time, 2),
-                "file_name": file.filename,
                 "extracted_at": datetime.now().isoformat()
             }
         })
         
     except Exception as e:
-        logger.error(f"OCR extraction error: {e}")
+        logger.error(f"Batch OCR extraction error: {e}")
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
-        
-        if severity_score >= 0.7:
-            return {'level': 'high', 'score': severity_score}
-        elif severity_score >= 0.5:
-            return {'level': 'medium', 'score': severity_score}
-        else:
-            return {'level': 'low', 'score': severity_score}
-    
-    def get_status(self):
-        return {
-            'models_loaded': True, 
-            'features': ['sentiment_analysis', 'category_detection', 'urgency_assessment', 'severity_calculation'],
-            'method': 'keyword_based_lightweight'
-        }
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = Flask(__name__)
-CORS(app)
+    finally:
+        for filepath in filepaths:
+            try:
+                os.unlink(filepath)
+            except:
+                pass
 
-# Initialize AI processors
-document_processor = DocumentProcessor()
-grievance_analyzer = LightweightGrievanceAnalyzer()
-
-# Create uploads directory
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'BharatChain AI Service',
-        'timestamp': datetime.now().isoformat()
-    })
+@app.route('/api/ocr/extract/stream', methods=['POST'])
+@rate_limit(max_requests=20, per_seconds=300)
+def extract_text_stream():
+    """Extract text page by page, streaming one NDJSON record per page and a final summary"""
+    upload, error = save_ocr_upload()
+    if error:
+        return error
+    filepath = upload["filepath"]
+    mode = upload["mode"]
+    profile = upload["profile"]
+    
+    def record(data):
+        return json.dumps(data, default=json_default) + "\n"
+    
+    def generate():
+        start_time = time.time()
+        try:
+            logger.info(f"Streaming text extraction from: {os.path.basename(filepath)}")
+            
+            if filepath.lower().endswith('.pdf'):
+                pages = []
+                for page in ocr_service.iter_pdf_pages(filepath, mode, profile):
+                    pages.append(page)
+                    yield record({"type": "page", "page": page})
+                result = get_ocr_service().assemble_pdf_result(pages)
+                text, confidence = result["total_text"], result["total_confidence"]
+            else:
+                result = ocr_service.extract_text(filepath, mode, profile)
+                text, confidence = result.get("text", ""), result.get("confidence", 0.0)
+                pages = [{
+                    "page_number": 1,
+                    "final_text": text,
+                    "confidence": confidence,
+                    "engine": result.get("best_engine", "unknown")
+                }]
+                yield record({"type": "page", "page": pages[0]})
+            
+            yield record({
+                "type": "summary",
+                "success": True,
+                "data": {
+                    "text": text,
+                    "confidence": confidence,
+                    "page_count": len(pages),
+                    "processing_time": round(time.time() - start_time, 2),
+                    "file_name": upload["file_name"],
+                    "extracted_at": datetime.now().isoformat()
+                }
+            })
+            
+        except Exception as e:
+            logger.error(f"Streaming OCR extraction error: {e}")
+            yield record({"type": "summary", "success": False, "error": str(e)})
+        finally:
+            # Clean up uploaded file once the stream is finished or abandoned
+            try:
+                os.unlink(filepath)
+            except:
+                pass
+    
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/analyze/document', methods=['POST'])
 def analyze_document():
     """Analyze uploaded document using AI"""
     try:
+        deadline, error = read_deadline()
+        if error:
+            return error
+        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -300,7 +475,7 @@ def analyze_document():
         logger.info(f"Processing document: {filename}")
         
         # Process document with AI
-        result = document_processor.analyze_document(filepath)
+        result = document_processor.analyze_document(filepath, deadline)
         
         # Clean up uploaded file
         os.remove(filepath)
@@ -319,6 +494,69 @@ def analyze_document():
             'error': str(e)
         }), 500
 
+@app.route('/jobs', methods=['POST'])
+@rate_limit(max_requests=20, per_seconds=300)
+def submit_job():
+    """Queue a document analysis or OCR job and return its id without waiting for the result"""
+    kind = request.form.get('type', 'document')
+    if kind not in JOB_HANDLERS:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown job type: {kind}"
+        }), 400
+    
+    callback_url = request.form.get('callback_url')
+    if callback_url:
+        callback_error = validate_callback_url(callback_url)
+        if callback_error:
+            return jsonify({
+                "success": False,
+                "error": callback_error
+            }), 400
+    
+    upload, error = save_ocr_upload()
+    if error:
+        return error
+    
+    try:
+        job_id = get_job_queue(JOB_HANDLERS).submit(
+            kind, upload["filepath"], upload["file_name"],
+            options={"mode": upload["mode"], "profile": upload["profile"]},
+            callback_url=callback_url
+        )
+    except Exception as e:
+        logger.error(f"Error queueing job: {e}")
+        try:
+            os.unlink(upload["filepath"])
+        except:
+            pass
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    
+    logger.info(f"Queued {kind} job {job_id} for {upload['file_name']}")
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued job, with its result once it has finished"""
+    job = get_job_queue(JOB_HANDLERS).get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return jsonify({
+        "success": True,
+        "data": job
+    })
+
 @app.route('/analyze/grievance', methods=['POST'])
 def analyze_grievance():
     """Analyze grievance text using AI"""
@@ -374,6 +612,9 @@ if __name__ == '__main__':
     logger.info(f"📁 Upload folder: {os.path.abspath(UPLOAD_FOLDER)}")
     logger.info(f"🔧 Max file size: {MAX_FILE_SIZE / (1024*1024):.1f}MB")
     
+    # Process jobs queued before the last shutdown
+    get_job_queue(JOB_HANDLERS)
+    
     # Check OCR service status
     ocr_status = ocr_service.get_service_status()
     logger.info(f"🤖 OCR Service Status: {ocr_status}")
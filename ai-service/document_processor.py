@@ -1,15 +1,17 @@
 import os
 import cv2
+import hashlib
 import numpy as np
-import pytesseract
-import easyocr
-from PIL import Image
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Iterator, Optional, Set, Tuple
 import json
-import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 
+from ocr_languages import OCR_LANGUAGES
+from pattern_bank import DOCUMENT_PATTERNS, SUSPICIOUS_PATTERNS, SECURITY_TERMS, TYPE_BANK, FIELD_BANK
+from enhanced_ocr import get_ocr_service, Deadline, DEADLINE_PAGE_RESERVE
+
 # Safe PyMuPDF import with fallback
 try:
     import fitz  # PyMuPDF
@@ -29,10 +31,88 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Files whose pixels are inspected for fraud indicators
+QUALITY_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Embedded PDF images decoded and in OCR at the same time, which bounds the memory they take
+PDF_IMAGE_CONCURRENCY = int(os.environ.get('AI_PDF_IMAGE_CONCURRENCY', '2'))
+# Embedded images read per document at most
+PDF_MAX_IMAGES = int(os.environ.get('AI_PDF_MAX_IMAGES', '50'))
+# Smaller images are icons, rules and logos rather than text
+PDF_MIN_IMAGE_SIDE = 64
+# Pages whose text layer is at least this long are not scanned and need no image OCR
+PDF_MIN_PAGE_TEXT = 50
+# PDF pages read per document (0 reads every page) and characters of text layer kept at most
+PDF_MAX_PAGES = int(os.environ.get('AI_PDF_MAX_PAGES', '0'))
+PDF_MAX_TEXT_CHARS = int(os.environ.get('AI_PDF_MAX_TEXT_CHARS', '2000000'))
+# Opt-in: stop reading pages once the document type is certain, i.e. its pattern count reaches
+# the score of full classification confidence and is at least twice that of any other type.
+# Later pages are then never seen by data extraction or fraud checks
+PDF_EARLY_STOP = os.environ.get('AI_PDF_EARLY_STOP', '0') != '0'
+PDF_EARLY_STOP_SCORE = 5
+
+class AnalysisContext:
+    """One document's inputs, decoded and normalized once and shared by every analysis stage"""
+    
+    def __init__(self, filepath: str, text: str, image: Optional[np.ndarray] = None):
+        self.filepath = filepath
+        self.text = text
+        self.stages = {}
+        self._text_lower = None
+        self._char_counts = None
+        self._image = None
+        self._image_loaded = False
+        # Pixels already decoded for OCR are reused rather than decoded again
+        if image is not None and filepath.lower().endswith(QUALITY_IMAGE_EXTENSIONS):
+            self._image = image
+            self._image_loaded = True
+    
+    @property
+    def text_lower(self) -> str:
+        """Lowercased text"""
+        if self._text_lower is None:
+            self._text_lower = self.text.lower()
+        return self._text_lower
+    
+    @property
+    def char_counts(self) -> Dict[str, int]:
+        """Letters, digits and whitespace in the text, counted in a single pass"""
+        if self._char_counts is None:
+            alpha = digit = space = 0
+            for c in self.text:
+                if c.isalpha():
+                    alpha += 1
+                elif c.isdigit():
+                    digit += 1
+                elif c.isspace():
+                    space += 1
+            self._char_counts = {'alpha': alpha, 'digit': digit, 'space': space}
+        return self._char_counts
+    
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """The document's pixels (BGR), decoded on first use; None for PDFs or unreadable files"""
+        if not self._image_loaded:
+            self._image_loaded = True
+            if self.filepath.lower().endswith(QUALITY_IMAGE_EXTENSIONS):
+                try:
+                    self._image = cv2.imdecode(np.fromfile(self.filepath, dtype=np.uint8), cv2.IMREAD_COLOR)
+                except Exception as e:
+                    logger.warning(f"Could not decode {self.filepath}: {e}")
+        return self._image
+    
+    def stage(self, name: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Result of an analysis stage, computed the first time any stage asks for it"""
+        if name not in self.stages:
+            self.stages[name] = compute()
+        return self.stages[name]
+
 class DocumentProcessor:
     def __init__(self):
         """Initialize the document processor with AI models"""
         self.models_loaded = False
+        # OCR runs on the shared service, whose engines are loaded once per process
+        self.ocr_service = get_ocr_service()
         self.load_models()
     
     def load_models(self):
@@ -40,17 +120,6 @@ class DocumentProcessor:
         try:
             logger.info("Loading AI models for document processing...")
             
-            # Initialize OCR readers with warning suppression
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                try:
-                    self.easyocr_reader = easyocr.Reader(['en', 'hi'])  # English and Hindi
-                    logger.info("EasyOCR loaded successfully")
-                except Exception as e:
-                    logger.warning(f"EasyOCR failed to load: {e}")
-                    self.easyocr_reader = None
-            
             # Try to load AI models only if transformers is available
             # Temporarily disabled due to TensorFlow dependency issues
             # try:
@@ -106,18 +175,8 @@ class DocumentProcessor:
             self.similarity_model = None
             HAS_SENTENCE_TRANSFORMERS = False
             
-            # Document type patterns
-            self.document_patterns = {
-                'aadhaar': [r'\d{4}\s\d{4}\s\d{4}', r'aadhaar', r'आधार'],
-                'pan': [r'[A-Z]{5}\d{4}[A-Z]{1}', r'permanent account number', r'pan card'],
-                'passport': [r'[A-Z]\d{7}', r'passport', r'republic of india'],
-                'driving_license': [r'[A-Z]{2}\d{13}', r'driving', r'license', r'transport'],
-                'voter_id': [r'[A-Z]{3}\d{7}', r'voter', r'election', r'eci'],
-                'birth_certificate': [r'birth certificate', r'date of birth', r'registrar'],
-                'income_certificate': [r'income certificate', r'annual income', r'salary'],
-                'caste_certificate': [r'caste certificate', r'category', r'sc|st|obc'],
-                'domicile': [r'domicile', r'residence', r'permanent resident']
-            }
+            # Document type patterns, compiled once in pattern_bank
+            self.document_patterns = DOCUMENT_PATTERNS
             
             self.models_loaded = True
             logger.info("Document processor initialized with available dependencies")
@@ -126,23 +185,36 @@ class DocumentProcessor:
             logger.error(f"Error loading models: {str(e)}")
             self.models_loaded = False
     
-    def analyze_document(self, filepath: str) -> Dict[str, Any]:
+    def analyze_document(self, filepath: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Main document analysis function"""
         try:
+            skipped_stages = []
+            image = None
+            
             # Detect file type
             file_type = self.detect_file_type(filepath)
             
             # Extract text based on file type
             if file_type == 'pdf':
-                text = self.extract_text_from_pdf(filepath)
-                images = self.extract_images_from_pdf(filepath)
+                thin_pages = set()
+                type_matches = {}
+                text = self.extract_text_from_pdf(filepath, thin_pages=thin_pages, type_matches=type_matches,
+                                                  skipped_stages=skipped_stages)
+                # Scanned pages carry their text in embedded images
+                image_text = self.ocr_pdf_images(filepath, thin_pages, deadline, skipped_stages)
+                if image_text:
+                    text = f"{text}\n{image_text}".strip()
+                    self.add_type_matches(type_matches, image_text)
             elif file_type in ['image', 'jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-                text = self.extract_text_from_image(filepath)
-                images = [filepath]
+                # Decoded once here for both OCR and the image quality checks
+                image, digest = self.load_image(filepath)
+                text = self.extract_text_from_image(filepath, deadline, skipped_stages, image, digest)
+                type_matches = None
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
             
-            # Perform comprehensive analysis
+            # Perform comprehensive analysis; stages share one decoded image and normalized text
+            context = AnalysisContext(filepath, text, image)
             analysis = {
                 'file_info': {
                     'type': file_type,
@@ -152,18 +224,20 @@ class DocumentProcessor:
                 'text_extraction': {
                     'extracted_text': text,
                     'text_length': len(text),
-                    'confidence': self.calculate_text_confidence(text)
+                    'confidence': self.calculate_text_confidence(text, context)
                 },
-                'document_classification': self.classify_document(text),
+                'document_classification': self.classify_document(text, context, type_matches),
                 'data_extraction': self.extract_structured_data(text),
-                'fraud_detection': self.detect_fraud_indicators(text, filepath),
-                'quality_assessment': self.assess_document_quality(filepath, text),
+                'fraud_detection': self.detect_fraud_indicators(text, filepath, context),
+                'quality_assessment': self.assess_document_quality(filepath, text, context),
                 'language_detection': self.detect_language(text),
-                'security_features': self.analyze_security_features(text)
+                'security_features': self.analyze_security_features(text, context)
             }
             
             # Calculate overall confidence
             analysis['overall_confidence'] = self.calculate_overall_confidence(analysis)
+            if skipped_stages:
+                analysis['skipped_stages'] = skipped_stages
             
             return analysis
             
@@ -202,89 +276,177 @@ class DocumentProcessor:
                 return 'image'
             return 'unknown'
     
-    def extract_text_from_pdf(self, filepath: str) -> str:
-        """Extract text from PDF using PyMuPDF with fallback"""
+    def iter_pdf_pages(self, filepath: str) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, text layer) one page at a time"""
+        doc = fitz.open(filepath)
+        try:
+            for page in doc:
+                yield page.number + 1, page.get_text()
+        finally:
+            doc.close()
+    
+    def extract_text_from_pdf(self, filepath: str, max_pages: Optional[int] = None, early_stop: Optional[bool] = None,
+                              thin_pages: Optional[Set[int]] = None,
+                              type_matches: Optional[Dict[str, List[str]]] = None,
+                              skipped_stages: Optional[List[str]] = None) -> str:
+        """Extract text from PDF page by page, collecting classification matches as pages arrive"""
         if not HAS_PYMUPDF:
             logger.warning("PyMuPDF not available, cannot extract text from PDF")
             return "PDF processing not available - PyMuPDF missing"
         
+        max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+        early_stop = PDF_EARLY_STOP if early_stop is None else early_stop
+        
+        pages = self.iter_pdf_pages(filepath)
         try:
-            doc = fitz.open(filepath)
-            text = ""
-            
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text += page.get_text()
-            
-            doc.close()
-            return text.strip()
+            parts = []
+            size = 0
+            if type_matches is None and early_stop:
+                type_matches = {}
+            truncated = False
+            for page_number, page_text in pages:
+                if max_pages and page_number > max_pages:
+                    truncated = True
+                    break
+                if len(page_text.strip()) < PDF_MIN_PAGE_TEXT and thin_pages is not None:
+                    thin_pages.add(page_number)
+                kept = page_text[:PDF_MAX_TEXT_CHARS - size]
+                parts.append(kept)
+                size += len(kept)
+                # Classification patterns are scanned page by page as the text arrives
+                if type_matches is not None:
+                    self.add_type_matches(type_matches, kept)
+                
+                if size >= PDF_MAX_TEXT_CHARS:
+                    truncated = len(kept) < len(page_text) or next(pages, None) is not None
+                    break
+                if early_stop and self.is_confidently_classified(type_matches):
+                    truncated = next(pages, None) is not None
+                    break
+            
+            if truncated and skipped_stages is not None:
+                skipped_stages.append('pdf_pages')
+            return "".join(parts).strip()
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             return ""
+        finally:
+            pages.close()
     
-    def extract_images_from_pdf(self, filepath: str) -> List[str]:
-        """Extract images from PDF for OCR with fallback"""
-        if not HAS_PYMUPDF:
-            logger.warning("PyMuPDF not available, cannot extract images from PDF")
-            return []
-        
+    def add_type_matches(self, type_matches: Dict[str, List[str]], text: str):
+        """Add the classification pattern matches of another piece of a document's text"""
+        for doc_type, found in TYPE_BANK.scan(text.lower()).items():
+            type_matches.setdefault(doc_type, []).extend(found)
+    
+    def is_confidently_classified(self, type_matches: Dict[str, List[str]]) -> bool:
+        """Whether per-type pattern matches already settle the document type"""
+        if not type_matches:
+            return False
+        best, runner_up = (sorted((len(found) for found in type_matches.values()), reverse=True) + [0])[:2]
+        return best >= PDF_EARLY_STOP_SCORE and best >= 2 * runner_up
+    
+    def iter_pdf_images(self, filepath: str, pages: Optional[Set[int]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (page number, grayscale pixels) for each distinct embedded image, decoded in memory one at a time"""
+        doc = fitz.open(filepath)
         try:
-            doc = fitz.open(filepath)
-            images = []
-            
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                image_list = page.get_images()
+            seen = set()
+            for page in doc:
+                page_number = page.number + 1
+                if pages is not None:
+                    if page_number not in pages:
+                        continue
+                elif len(page.get_text().strip()) >= PDF_MIN_PAGE_TEXT:
+                    continue
                 
-                for img_index, img in enumerate(image_list):
-                    xref = img[0]
-                    pix = fitz.Pixmap(doc, xref)
-                    
-                    if pix.n - pix.alpha < 4:  # GRAY or RGB
-                        img_path = f"temp_page_{page_num}_img_{img_index}.png"
-                        pix.save(img_path)
-                        images.append(img_path)
-                    
+                for img in page.get_images():
+                    xref, width, height = img[0], img[2], img[3]
+                    # Logos and backgrounds repeated on every page are read once
+                    if xref in seen or min(width, height) < PDF_MIN_IMAGE_SIDE:
+                        continue
+                    seen.add(xref)
+                    try:
+                        pix = fitz.Pixmap(doc, xref)
+                        if pix.alpha:
+                            pix = fitz.Pixmap(pix, 0)
+                        if pix.n > 3:  # CMYK
+                            pix = fitz.Pixmap(fitz.csRGB, pix)
+                        image = self.ocr_service.pixmap_to_array(pix)
+                    except Exception as e:
+                        logger.warning(f"Could not decode image {xref} on page {page_number}: {e}")
+                        continue
                     pix = None
-            
+                    yield page_number, image
+        finally:
             doc.close()
-            return images
-        except Exception as e:
-            logger.error(f"Error extracting images from PDF: {str(e)}")
-            return []
     
-    def extract_text_from_image(self, filepath: str) -> str:
-        """Extract text from image using multiple OCR methods"""
-        try:
-            # Method 1: EasyOCR
-            easyocr_text = ""
-            if self.easyocr_reader:
+    def ocr_pdf_images(self, filepath: str, pages: Optional[Set[int]] = None, deadline: Optional[Deadline] = None,
+                       skipped_stages: Optional[List[str]] = None) -> str:
+        """OCR the embedded images of a PDF in memory, a few at a time, and return their text in page order"""
+        if not HAS_PYMUPDF:
+            return ""
+        
+        texts = []  # (page number, image order, text)
+        images = self.iter_pdf_images(filepath, pages)
+        
+        def collect(futures):
+            for future in futures:
+                page_number, order = in_flight.pop(future)
                 try:
-                    results = self.easyocr_reader.readtext(filepath)
-                    easyocr_text = " ".join([result[1] for result in results])
+                    result = future.result()
                 except Exception as e:
-                    logger.warning(f"EasyOCR failed: {str(e)}")
-            
-            # Method 2: Tesseract OCR
-            tesseract_text = ""
-            try:
-                image = Image.open(filepath)
-                tesseract_text = pytesseract.image_to_string(image)
-            except Exception as e:
-                logger.warning(f"Tesseract OCR failed: {str(e)}")
-            
-            # Combine results and choose the better one
-            if len(easyocr_text) > len(tesseract_text):
-                return easyocr_text
-            else:
-                return tesseract_text
-                
+                    logger.warning(f"OCR failed for an image on page {page_number}: {e}")
+                    continue
+                if skipped_stages is not None:
+                    skipped_stages.extend(stage for stage in result.get('skipped_stages', [])
+                                          if stage not in skipped_stages)
+                if result.get('text'):
+                    texts.append((page_number, order, result['text']))
+        
+        in_flight = {}
+        try:
+            with ThreadPoolExecutor(max_workers=PDF_IMAGE_CONCURRENCY, thread_name_prefix="pdf-image-ocr") as executor:
+                for order, (page_number, image) in enumerate(images):
+                    if order >= PDF_MAX_IMAGES or (deadline and not deadline.allows(DEADLINE_PAGE_RESERVE)):
+                        if skipped_stages is not None:
+                            skipped_stages.append('pdf_images')
+                        break
+                    future = executor.submit(self.ocr_service.extract_from_image, image, None, None, deadline)
+                    in_flight[future] = (page_number, order)
+                    image = None
+                    # The next image is only decoded once a slot frees up
+                    if len(in_flight) >= PDF_IMAGE_CONCURRENCY:
+                        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                        collect(done)
+                collect(list(in_flight))
         except Exception as e:
-            logger.error(f"Error extracting text from image: {str(e)}")
-            return ""
+            logger.error(f"Error reading images from PDF: {str(e)}")
+        finally:
+            images.close()
+        
+        return "\n".join(text for _, _, text in sorted(texts))
+    
+    def load_image(self, filepath: str) -> Tuple[Optional[np.ndarray], str]:
+        """Read an image file once: its BGR pixels (None when undecodable) and the SHA-256 of its bytes"""
+        data = np.fromfile(filepath, dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR), hashlib.sha256(data).hexdigest()
+    
+    def extract_text_from_image(self, filepath: str, deadline: Optional[Deadline] = None,
+                                skipped_stages: Optional[List[str]] = None, image: Optional[np.ndarray] = None,
+                                digest: Optional[str] = None) -> str:
+        """Extract text from image through the shared OCR service, with its preprocessing and cache"""
+        if image is not None and digest:
+            result = self.ocr_service.extract_image_cached(image, digest, deadline=deadline)
+        else:
+            result = self.ocr_service.extract_text(filepath, deadline=deadline)
+        if result.get('error'):
+            logger.warning(f"OCR failed for {filepath}: {result['error']}")
+        if skipped_stages is not None:
+            skipped_stages.extend(result.get('skipped_stages', []))
+        return result.get('text', '')
     
-    def classify_document(self, text: str) -> Dict[str, Any]:
-        """Classify document type using pattern matching and AI"""
+    def classify_document(self, text: str, context: Optional[AnalysisContext] = None,
+                          type_matches: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+        """Classify document type using pattern matching and AI, reusing matches collected while reading"""
         classification = {
             'detected_type': 'unknown',
             'confidence': 0.0,
@@ -293,22 +455,15 @@ class DocumentProcessor:
         }
         
         try:
-            text_lower = text.lower()
             scores = {}
             
             # Pattern-based classification
-            for doc_type, patterns in self.document_patterns.items():
-                score = 0
-                found_patterns = []
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text_lower)
-                    if matches:
-                        score += len(matches)
-                        found_patterns.extend(matches)
-                
-                if score > 0:
-                    scores[doc_type] = score
+            if type_matches is None:
+                type_matches = TYPE_BANK.scan(context.text_lower if context else text.lower())
+            for doc_type in self.document_patterns:
+                found_patterns = type_matches.get(doc_type)
+                if found_patterns:
+                    scores[doc_type] = len(found_patterns)
                     classification['patterns_found'].extend(found_patterns)
             
             # Determine best match
@@ -338,55 +493,23 @@ class DocumentProcessor:
         }
         
         try:
-            # Extract Aadhaar numbers
-            aadhaar_pattern = r'\d{4}\s?\d{4}\s?\d{4}'
-            aadhaar_matches = re.findall(aadhaar_pattern, text)
-            if aadhaar_matches:
-                extracted_data['numbers']['aadhaar'] = aadhaar_matches
-            
-            # Extract PAN numbers
-            pan_pattern = r'[A-Z]{5}\d{4}[A-Z]{1}'
-            pan_matches = re.findall(pan_pattern, text)
-            if pan_matches:
-                extracted_data['numbers']['pan'] = pan_matches
-            
-            # Extract dates
-            date_patterns = [
-                r'\d{1,2}[-/]\d{1,2}[-/]\d{4}',
-                r'\d{1,2}[-/]\d{1,2}[-/]\d{2}',
-                r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'
-            ]
-            dates = []
-            for pattern in date_patterns:
-                dates.extend(re.findall(pattern, text))
-            if dates:
-                extracted_data['dates']['found_dates'] = dates
-            
-            # Extract names (simple heuristic)
-            name_pattern = r'Name[:\s]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-            name_matches = re.findall(name_pattern, text, re.IGNORECASE)
-            if name_matches:
-                extracted_data['personal_info']['names'] = name_matches
-            
-            # Extract phone numbers
-            phone_pattern = r'(?:\+91|91)?[6-9]\d{9}'
-            phone_matches = re.findall(phone_pattern, text)
-            if phone_matches:
-                extracted_data['numbers']['phone'] = phone_matches
-            
-            # Extract emails
-            email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            email_matches = re.findall(email_pattern, text)
-            if email_matches:
-                extracted_data['personal_info']['emails'] = email_matches
+            # Aadhaar, PAN, dates, names, phone numbers and emails
+            for (section, field), matches in FIELD_BANK.scan(text).items():
+                extracted_data[section][field] = matches
         
         except Exception as e:
             logger.error(f"Error extracting structured data: {str(e)}")
         
         return extracted_data
     
-    def detect_fraud_indicators(self, text: str, filepath: str) -> Dict[str, Any]:
-        """Detect potential fraud indicators"""
+    def detect_fraud_indicators(self, text: str, filepath: str,
+                                context: Optional[AnalysisContext] = None) -> Dict[str, Any]:
+        """Detect potential fraud indicators, once per analysis context"""
+        context = context or AnalysisContext(filepath, text)
+        return context.stage('fraud_detection', lambda: self.find_fraud_indicators(context))
+    
+    def find_fraud_indicators(self, context: AnalysisContext) -> Dict[str, Any]:
+        """Run the text and image fraud checks on a document"""
         fraud_analysis = {
             'risk_score': 0.0,
             'indicators': [],
@@ -398,19 +521,13 @@ class DocumentProcessor:
             risk_factors = []
             
             # Text-based fraud indicators
-            suspicious_patterns = [
-                (r'photocopy|xerox|duplicate', 'Possible photocopy'),
-                (r'invalid|fake|forged', 'Contains suspicious keywords'),
-                (r'specimen|sample|example', 'May be a specimen document')
-            ]
-            
-            for pattern, description in suspicious_patterns:
-                if re.search(pattern, text, re.IGNORECASE):
+            for pattern, description in SUSPICIOUS_PATTERNS:
+                if pattern.search(context.text_lower):
                     risk_factors.append(description)
             
             # Image quality analysis (if image file)
-            if filepath.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
-                image_risk = self.analyze_image_quality(filepath)
+            if context.filepath.lower().endswith(QUALITY_IMAGE_EXTENSIONS):
+                image_risk = self.analyze_image_quality(context.filepath, context.image)
                 fraud_analysis['image_analysis'] = image_risk
                 if image_risk.get('suspicious', False):
                     risk_factors.extend(image_risk.get('issues', []))
@@ -423,8 +540,8 @@ class DocumentProcessor:
         
         return fraud_analysis
     
-    def analyze_image_quality(self, filepath: str) -> Dict[str, Any]:
-        """Analyze image quality for fraud detection"""
+    def analyze_image_quality(self, filepath: str, img: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Analyze image quality for fraud detection, reading the file unless already decoded"""
         analysis = {
             'suspicious': False,
             'issues': [],
@@ -432,7 +549,8 @@ class DocumentProcessor:
         }
         
         try:
-            img = cv2.imread(filepath)
+            if img is None:
+                img = cv2.imread(filepath)
             if img is None:
                 return analysis
             
@@ -444,10 +562,6 @@ class DocumentProcessor:
                 analysis['issues'].append('Low image sharpness')
                 analysis['suspicious'] = True
             
-            # Check for extreme compression artifacts
-            _, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 10])
-            decoded = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
-            
             # Basic quality score
             analysis['quality_score'] = min(laplacian_var / 500.0, 1.0)
             
@@ -456,8 +570,10 @@ class DocumentProcessor:
         
         return analysis
     
-    def assess_document_quality(self, filepath: str, text: str) -> Dict[str, Any]:
+    def assess_document_quality(self, filepath: str, text: str,
+                                context: Optional[AnalysisContext] = None) -> Dict[str, Any]:
         """Assess overall document quality"""
+        context = context or AnalysisContext(filepath, text)
         quality = {
             'text_clarity': 0.0,
             'completeness': 0.0,
@@ -468,16 +584,16 @@ class DocumentProcessor:
         try:
             # Text clarity (based on extracted text quality)
             if text:
-                alpha_ratio = sum(c.isalpha() for c in text) / len(text)
+                alpha_ratio = context.char_counts['alpha'] / len(text)
                 quality['text_clarity'] = alpha_ratio
             
             # Completeness (basic heuristic)
             expected_elements = ['name', 'number', 'date']
-            found_elements = sum(1 for elem in expected_elements if elem in text.lower())
+            found_elements = sum(1 for elem in expected_elements if elem in context.text_lower)
             quality['completeness'] = found_elements / len(expected_elements)
             
-            # Authenticity score (inverse of fraud risk)
-            fraud_analysis = self.detect_fraud_indicators(text, filepath)
+            # Authenticity score (inverse of fraud risk), reusing the fraud stage's result
+            fraud_analysis = self.detect_fraud_indicators(text, filepath, context)
             quality['authenticity_score'] = 1.0 - fraud_analysis['risk_score']
             
             # Overall score
@@ -536,7 +652,7 @@ class DocumentProcessor:
             logger.error(f"Error detecting language: {str(e)}")
             return {'primary_language': 'unknown', 'confidence': 0.0}
     
-    def analyze_security_features(self, text: str) -> Dict[str, Any]:
+    def analyze_security_features(self, text: str, context: Optional[AnalysisContext] = None) -> Dict[str, Any]:
         """Analyze security features mentioned in the document"""
         security_features = {
             'watermarks': False,
@@ -547,7 +663,7 @@ class DocumentProcessor:
         }
         
         try:
-            text_lower = text.lower()
+            text_lower = context.text_lower if context else text.lower()
             
             # Check for security feature keywords
             security_keywords = {
@@ -562,10 +678,7 @@ class DocumentProcessor:
                     security_features[feature] = True
             
             # Look for other security-related terms
-            other_terms = re.findall(
-                r'\b(?:secure|protected|authenticated|verified|certified)\b',
-                text_lower
-            )
+            other_terms = SECURITY_TERMS.findall(text_lower)
             security_features['other_features'] = list(set(other_terms))
             
         except Exception as e:
@@ -573,15 +686,16 @@ class DocumentProcessor:
         
         return security_features
     
-    def calculate_text_confidence(self, text: str) -> float:
+    def calculate_text_confidence(self, text: str, context: Optional[AnalysisContext] = None) -> float:
         """Calculate confidence in text extraction"""
         if not text:
             return 0.0
         
         # Simple heuristic based on text characteristics
-        alpha_ratio = sum(c.isalpha() for c in text) / len(text)
-        digit_ratio = sum(c.isdigit() for c in text) / len(text)
-        space_ratio = sum(c.isspace() for c in text) / len(text)
+        counts = (context or AnalysisContext('', text)).char_counts
+        alpha_ratio = counts['alpha'] / len(text)
+        digit_ratio = counts['digit'] / len(text)
+        space_ratio = counts['space'] / len(text)
         
         # Good text should have reasonable ratios of these characters
         confidence = (alpha_ratio * 0.6 + digit_ratio * 0.2 + space_ratio * 0.2)
@@ -618,7 +732,9 @@ class DocumentProcessor:
         """Get status of the document processor"""
         return {
             'models_loaded': self.models_loaded,
-            'available_languages': ['en', 'hi'],
+            'ocr_ready': self.ocr_service.ready.is_set(),
+            'available_languages': list(OCR_LANGUAGES),
+            'easyocr_readers': self.ocr_service.readers.get_stats(),
             'supported_formats': ['pdf', 'jpg', 'jpeg', 'png', 'bmp', 'tiff'],
             'ocr_engines': ['easyocr', 'tesseract'],
             'features': [
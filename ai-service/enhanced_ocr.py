@@ -4,61 +4,385 @@ Provides real OCR functionality using multiple engines
 """
 
 import os
+import time
+import hashlib
+import threading
 import cv2
 import numpy as np
-import pytesseract
-import easyocr
-from PIL import Image
 import logging
 import fitz  # PyMuPDF
-from typing import Dict, List, Any, Optional
-import tempfile
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 
+from ocr_cache import get_ocr_cache, OCR_CACHE_VERSION
+from tesseract_engine import get_tesseract_engine
+from ocr_languages import get_easyocr_readers, choose_languages, OCR_LANGUAGES, OCR_SCRIPT_DETECTION
+from ocr_words import WordResults, restore_words
+
 logger = logging.getLogger(__name__)
 
+# Confidence at which the first finished engine wins without waiting for the others
+EARLY_EXIT_CONFIDENCE = float(os.environ.get('OCR_EARLY_EXIT_CONFIDENCE', '0.85'))
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
+
+# Engine strategies: "parallel" runs all engines, "cascade" starts with Tesseract
+OCR_MODES = ('parallel', 'cascade')
+OCR_MODE = os.environ.get('OCR_MODE', 'parallel')
+
+# Tesseract results below either threshold are escalated to EasyOCR in cascade mode
+CASCADE_MIN_CONFIDENCE = float(os.environ.get('OCR_CASCADE_MIN_CONFIDENCE', '0.75'))
+CASCADE_MIN_DENSITY = float(os.environ.get('OCR_CASCADE_MIN_DENSITY', '20'))  # chars per megapixel
+
+# Preprocessing profiles, from cheapest to most thorough; "auto" picks one per image
+PREPROCESSING_PROFILES = ('fast', 'balanced', 'max_quality', 'auto')
+PREPROCESSING_PROFILE = os.environ.get('OCR_PREPROCESSING_PROFILE', 'auto')
+
+# Noise level (std dev in grey levels) above which "auto" applies heavy denoising
+AUTO_DENOISE_NOISE = float(os.environ.get('OCR_AUTO_DENOISE_NOISE', '6.0'))
+# Below this noise level, sharp images are treated as clean digital scans
+AUTO_CLEAN_NOISE = float(os.environ.get('OCR_AUTO_CLEAN_NOISE', '1.5'))
+AUTO_MIN_SHARPNESS = float(os.environ.get('OCR_AUTO_MIN_SHARPNESS', '100'))
+
+# Images whose median character height exceeds the target by the tolerance are scaled down
+TARGET_TEXT_HEIGHT = float(os.environ.get('OCR_TARGET_TEXT_HEIGHT', '40'))  # pixels
+TEXT_HEIGHT_TOLERANCE = 1.5
+# Upper bound on OCR input size when no text height can be measured
+MAX_OCR_MEGAPIXELS = float(os.environ.get('OCR_MAX_MEGAPIXELS', '12'))
+
+# Orientation (Tesseract OSD) and skew correction before recognition
+ORIENTATION_CORRECTION = os.environ.get('OCR_ORIENTATION_CORRECTION', '1') != '0'
+MAX_SKEW_ANGLE = float(os.environ.get('OCR_MAX_SKEW_ANGLE', '15'))  # degrees searched either way
+MIN_SKEW_ANGLE = 0.3  # smaller skews are not worth resampling the image for
+OSD_MIN_CONFIDENCE = float(os.environ.get('OCR_OSD_MIN_CONFIDENCE', '2.0'))
+SKEW_SAMPLE_SIDE = 800  # long side of the copy skew is measured on
+OSD_SAMPLE_SIDE = 1600
+# Without tesserocr every OSD call starts a tesseract process, so it is opt-in there
+OSD_SUBPROCESS = os.environ.get('OCR_OSD_SUBPROCESS', '0') != '0'
+
+# PDF pages are rendered at 2x zoom unless their long side would exceed this many pixels
+PDF_ZOOM = 2.0
+PDF_MAX_RENDER_SIDE = int(os.environ.get('OCR_PDF_MAX_RENDER_SIDE', '1684'))  # A4 at 2x
+
+# Shared text detection: both engines only see the detected lines of a page
+SHARED_DETECTION = os.environ.get('OCR_SHARED_DETECTION', '1') != '0'
+REGION_MERGE_WIDTH = 15  # pixels of horizontal smearing that join characters into words and lines
+REGION_MAX_COVERAGE = 0.8  # above this share of the page, recognize the full page instead
+REGION_FRAGMENT_HEIGHT = 0.6  # blobs lower than this share of the median blob height are dots and marks
+REGION_CACHE_SIZE = 32
+MOSAIC_GAP = 10  # white pixels between the lines packed for Tesseract
+
+# Engines load in a background thread so the service can take requests right away
+OCR_LAZY_INIT = os.environ.get('OCR_LAZY_INIT', '1') != '0'
+# Seconds a request waits for warm engines before running with whatever has loaded
+OCR_READY_WAIT = float(os.environ.get('OCR_READY_WAIT', '0'))
+
+# Budget an optional stage needs left before a deadline for it to still run, in seconds
+DEADLINE_DENOISE_RESERVE = float(os.environ.get('OCR_DEADLINE_DENOISE_RESERVE', '2.0'))
+DEADLINE_ENGINE_RESERVE = float(os.environ.get('OCR_DEADLINE_ENGINE_RESERVE', '1.0'))
+DEADLINE_PAGE_RESERVE = float(os.environ.get('OCR_DEADLINE_PAGE_RESERVE', '1.0'))
+DEADLINE_OSD_RESERVE = float(os.environ.get('OCR_DEADLINE_OSD_RESERVE', '2.0'))
+
+class Deadline:
+    """Point in time by which a request must be answered"""
+    
+    def __init__(self, seconds: float):
+        """Start a budget of the given number of seconds"""
+        # Wall-clock time, so the deadline means the same in OCR worker processes
+        self.expires_at = time.time() + seconds
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self.expires_at - time.time())
+    
+    def allows(self, seconds: float = 0.0) -> bool:
+        """Whether more than the given number of seconds are left"""
+        return self.remaining() > seconds
+
+def merge_skipped_stages(*stage_lists: Optional[List[str]]) -> List[str]:
+    """Union of skipped-stage lists, keeping first-seen order"""
+    merged = []
+    for stages in stage_lists:
+        for stage in stages or []:
+            if stage not in merged:
+                merged.append(stage)
+    return merged
+
+def clamp_regions(regions: List[List[int]], shape: Tuple[int, ...]) -> List[List[int]]:
+    """Regions [x0, y0, x1, y1] cut to an image of the given shape, dropping those left empty"""
+    height, width = shape[:2]
+    clamped = []
+    for x0, y0, x1, y1 in regions:
+        x0, x1 = max(0, int(x0)), min(width, int(x1))
+        y0, y1 = max(0, int(y0)), min(height, int(y1))
+        if x1 > x0 and y1 > y0:
+            clamped.append([x0, y0, x1, y1])
+    return clamped
+
 class EnhancedOCRService:
     """Enhanced OCR service with multiple engines and preprocessing"""
     
-    def __init__(self):
+    def __init__(self, mode: Optional[str] = None,
+                 preprocessing_profile: Optional[str] = None,
+                 early_exit_confidence: Optional[float] = None,
+                 cascade_min_confidence: Optional[float] = None,
+                 cascade_min_density: Optional[float] = None,
+                 lazy: Optional[bool] = None):
         """Initialize OCR service with multiple engines"""
         self.easyocr_reader = None
+        self.readers = get_easyocr_readers()  # Shared with every other service in the process
+        self.tesseract_engine = None
         self.tesseract_available = False
-        self.initialize_engines()
+        self.mode = mode or OCR_MODE
+        self.preprocessing_profile = preprocessing_profile or PREPROCESSING_PROFILE
+        self.early_exit_confidence = (
+            EARLY_EXIT_CONFIDENCE if early_exit_confidence is None else early_exit_confidence
+        )
+        self.cascade_min_confidence = (
+            CASCADE_MIN_CONFIDENCE if cascade_min_confidence is None else cascade_min_confidence
+        )
+        self.cascade_min_density = (
+            CASCADE_MIN_DENSITY if cascade_min_density is None else cascade_min_density
+        )
+        self.region_cache = OrderedDict()
+        self.region_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.start_engine_executor()
+        if OCR_LAZY_INIT if lazy is None else lazy:
+            threading.Thread(target=self.initialize_engines, name="ocr-engine-init", daemon=True).start()
+        else:
+            self.initialize_engines()
+    
+    def start_engine_executor(self):
+        """Create the thread pool that runs OCR engines side by side"""
+        # Threads do not survive fork, so forked workers call this again
+        self.engine_executor = ThreadPoolExecutor(
+            max_workers=max(2, (os.cpu_count() or 1) * 2),
+            thread_name_prefix="ocr-engine"
+        )
     
     def initialize_engines(self):
         """Initialize all available OCR engines"""
+        # Tesseract loads quickly, so it serves requests while EasyOCR is still loading
+        try:
+            self.tesseract_engine = get_tesseract_engine()
+            self.tesseract_available = True
+            logger.info(f"✅ Tesseract OCR available ({self.tesseract_engine.backend})")
+        except Exception as e:
+            logger.warning(f"⚠️ Tesseract OCR not available: {e}")
+            self.tesseract_available = False
+        
         try:
-            # Initialize EasyOCR with English and Hindi support
+            # Initialize EasyOCR with the full language set; smaller sets load on demand
             logger.info("Initializing EasyOCR...")
-            self.easyocr_reader = easyocr.Reader(['en', 'hi'], gpu=False)
+            self.easyocr_reader = self.readers.load_default()
             logger.info("✅ EasyOCR initialized successfully")
         except Exception as e:
             logger.error(f"❌ EasyOCR initialization failed: {e}")
             self.easyocr_reader = None
         
-        # Test Tesseract availability
-        try:
-            pytesseract.get_tesseract_version()
-            self.tesseract_available = True
-            logger.info("✅ Tesseract OCR available")
-        except Exception as e:
-            logger.warning(f"⚠️ Tesseract OCR not available: {e}")
-            self.tesseract_available = False
+        self.ready.set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait up to OCR_READY_WAIT seconds for the engines, returning whether they are ready"""
+        return self.ready.wait(OCR_READY_WAIT if timeout is None else timeout)
+    
+    def load_image(self, image_path: str) -> np.ndarray:
+        """Decode an image file once into an ndarray"""
+        data = np.fromfile(image_path, dtype=np.uint8)
+        img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Could not read image")
+        return img
+    
+    def pixmap_to_array(self, pix) -> np.ndarray:
+        """Convert a PyMuPDF pixmap to a grayscale ndarray without touching disk"""
+        samples = np.frombuffer(pix.samples, dtype=np.uint8)
+        img = samples.reshape(pix.height, pix.width, pix.n)
+        if pix.n == 1:
+            return img[:, :, 0]
+        return cv2.cvtColor(img[:, :, :3], cv2.COLOR_RGB2GRAY)
+    
+    def estimate_text_height(self, gray: np.ndarray) -> Optional[float]:
+        """Median character height in pixels, measured on a downsampled copy"""
+        step = max(1, max(gray.shape) // 1024)
+        small = gray
+        if step > 1:
+            small = cv2.resize(gray, (gray.shape[1] // step, gray.shape[0] // step),
+                               interpolation=cv2.INTER_AREA)
+        
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        
+        # Keep character-shaped blobs, dropping specks, rules and photos
+        glyphs = (heights >= 3) & (areas >= 6) & (widths < heights * 4) & (heights < small.shape[0] * 0.2)
+        if glyphs.sum() < 5:
+            return None
+        return float(np.median(heights[glyphs])) * step
+    
+    def normalize_resolution(self, gray: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Scale oversized images down so characters are close to the target height"""
+        text_height = self.estimate_text_height(gray)
+        megapixels = gray.shape[0] * gray.shape[1] / 1_000_000
+        
+        scale = 1.0
+        if text_height is not None:
+            if text_height > TARGET_TEXT_HEIGHT * TEXT_HEIGHT_TOLERANCE:
+                scale = TARGET_TEXT_HEIGHT / text_height
+        elif megapixels > MAX_OCR_MEGAPIXELS:
+            scale = (MAX_OCR_MEGAPIXELS / megapixels) ** 0.5
+        
+        info = {"text_height": text_height, "scale": round(scale, 3)}
+        if scale < 1.0:
+            size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return gray, info
+    
+    def osd_enabled(self) -> bool:
+        """Whether pages go through Tesseract's orientation detection"""
+        engine = self.tesseract_engine
+        if not engine or not engine.osd_available:
+            return False
+        return engine.backend == 'tesserocr' or OSD_SUBPROCESS
+    
+    def correct_orientation(self, gray: np.ndarray,
+                            deadline: Optional[Deadline] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Turn a page upright and straighten its text lines"""
+        info = {"rotation": 0, "skew_angle": 0.0}
+        
+        # Quarter turns come from Tesseract's orientation detection, when it is cheap to run
+        use_osd = self.osd_enabled()
+        if use_osd and deadline and not deadline.allows(DEADLINE_OSD_RESERVE):
+            info["skipped_stages"] = ["orientation_detection"]
+            use_osd = False
+        if use_osd:
+            osd = self.tesseract_engine.detect_orientation(self.downsample(gray, OSD_SAMPLE_SIDE))
+            if osd and osd["rotate"] and osd["confidence"] >= OSD_MIN_CONFIDENCE:
+                info["rotation"] = osd["rotate"]
+                info["osd_confidence"] = round(osd["confidence"], 2)
+                gray = cv2.rotate(gray, {
+                    90: cv2.ROTATE_90_CLOCKWISE,
+                    180: cv2.ROTATE_180,
+                    270: cv2.ROTATE_90_COUNTERCLOCKWISE
+                }[osd["rotate"]])
+        
+        angle = self.estimate_skew(gray)
+        if abs(angle) < MIN_SKEW_ANGLE:
+            return gray, info
+        
+        # Rotate back about the center on an enlarged canvas so no corner is cut off
+        height, width = gray.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_width, new_height = int(height * sin + width * cos), int(height * cos + width * sin)
+        matrix[0, 2] += (new_width - width) / 2
+        matrix[1, 2] += (new_height - height) / 2
+        gray = cv2.warpAffine(gray, matrix, (new_width, new_height),
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        info["skew_angle"] = round(angle, 2)
+        return gray, info
+    
+    def estimate_skew(self, gray: np.ndarray) -> float:
+        """Counterclockwise tilt of the text lines, in degrees"""
+        small = self.downsample(gray, SKEW_SAMPLE_SIDE)
+        _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        ys, xs = np.nonzero(ink)
+        if len(xs) < 200:
+            return 0.0
+        step = max(1, len(xs) // 20000)
+        xs, ys = xs[::step].astype(np.float32), ys[::step].astype(np.float32)
+        
+        def sharpness(angle):
+            # Projecting ink onto rows gives tall narrow peaks when lines run along them
+            theta = np.deg2rad(angle)
+            rows = ys * np.cos(theta) - xs * np.sin(theta)
+            profile = np.bincount((rows - rows.min()).astype(np.int32))
+            return float(np.dot(profile, profile))
+        
+        # Coarse search in whole degrees, then refine around the best one
+        coarse = np.arange(-MAX_SKEW_ANGLE, MAX_SKEW_ANGLE + 1, 1.0)
+        best = max(coarse, key=sharpness)
+        fine = np.arange(best - 1.0, best + 1.05, 0.1)
+        return -float(max(fine, key=sharpness))
+    
+    def downsample(self, gray: np.ndarray, max_side: int) -> np.ndarray:
+        """Area-resized copy whose long side is at most max_side"""
+        scale = max_side / max(gray.shape)
+        if scale >= 1.0:
+            return gray
+        size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
     
-    def preprocess_image(self, image_path: str) -> str:
-        """Preprocess image for better OCR results"""
+    def estimate_image_quality(self, gray: np.ndarray) -> Dict[str, float]:
+        """Estimate noise and sharpness from a subsampled copy of the image"""
+        # Plain subsampling keeps per-pixel noise, unlike area resizing
+        step = max(1, max(gray.shape) // 512)
+        sample = gray[::step, ::step].astype(np.float32)
+        
+        # Robust noise estimate: median response of a Laplacian-difference kernel,
+        # which ignores the sparse strong responses on text edges
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = np.abs(cv2.filter2D(sample, -1, kernel))
+        noise = float(np.median(response)) / (0.6745 * 6)
+        sharpness = float(cv2.Laplacian(sample, cv2.CV_32F).var())
+        
+        return {"noise": round(noise, 2), "sharpness": round(sharpness, 1)}
+    
+    def choose_profile(self, quality: Dict[str, float]) -> str:
+        """Pick the cheapest preprocessing profile that suits the measured image quality"""
+        if quality["noise"] > AUTO_DENOISE_NOISE:
+            return "max_quality"
+        if quality["noise"] < AUTO_CLEAN_NOISE and quality["sharpness"] >= AUTO_MIN_SHARPNESS:
+            return "fast"
+        return "balanced"
+    
+    def preprocess_image(self, image: np.ndarray, profile: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Preprocess image in memory for better OCR results"""
+        profile = profile or self.preprocessing_profile
+        info = {"profile": profile, "applied_profile": profile}
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
-                raise ValueError("Could not read image")
-            
             # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            if image.ndim == 3:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            else:
+                gray = image
             
-            # Apply noise reduction
-            denoised = cv2.fastNlMeansDenoising(gray)
+            # Oversized photos lose nothing useful for OCR when scaled to the target text height
+            gray, resolution = self.normalize_resolution(gray)
+            info.update(resolution)
+            
+            # Rotated or skewed phone photos read badly in both engines
+            if ORIENTATION_CORRECTION:
+                gray, orientation = self.correct_orientation(gray, deadline)
+                if "skipped_stages" in orientation:
+                    info["skipped_stages"] = orientation.pop("skipped_stages")
+                info["orientation"] = orientation
+            
+            if profile == "auto":
+                quality = self.estimate_image_quality(gray)
+                info.update(quality)
+                info["applied_profile"] = self.choose_profile(quality)
+            if info["applied_profile"] == "max_quality" and deadline and not deadline.allows(DEADLINE_DENOISE_RESERVE):
+                info["applied_profile"] = "balanced"
+                info["skipped_stages"] = merge_skipped_stages(info.get("skipped_stages"), ["heavy_denoise"])
+            applied = info["applied_profile"]
+            
+            if applied == "fast":
+                # Clean digital scans only need a global threshold
+                _, processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                return processed, info
+            
+            if applied == "max_quality":
+                # Non-local means is by far the slowest step, so it is reserved for noisy images
+                denoised = cv2.fastNlMeansDenoising(gray)
+            else:
+                denoised = cv2.medianBlur(gray, 3)
             
             # Apply adaptive thresholding
             thresh = cv2.adaptiveThreshold(
@@ -66,95 +390,123 @@ class EnhancedOCRService:
                 cv2.THRESH_BINARY, 11, 2
             )
             
+            if applied == "balanced":
+                return thresh, info
+            
             # Morphological operations to clean up
             kernel = np.ones((1, 1), np.uint8)
             processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
             processed = cv2.morphologyEx(processed, cv2.MORPH_OPEN, kernel)
             
-            # Save processed image
-            processed_path = f"{image_path}_processed.png"
-            cv2.imwrite(processed_path, processed)
-            
-            return processed_path
+            return processed, info
             
         except Exception as e:
             logger.error(f"Error preprocessing image: {e}")
-            return image_path  # Return original if preprocessing fails
+            info["error"] = str(e)
+            return image, info  # Return original if preprocessing fails
     
-    def extract_with_easyocr(self, image_path: str) -> Dict[str, Any]:
-        """Extract text using EasyOCR"""
+    def extract_with_easyocr(self, image: np.ndarray,
+                             regions: Optional[List[List[int]]] = None) -> Dict[str, Any]:
+        """Extract text using EasyOCR, limited to the given text regions when provided"""
         if not self.easyocr_reader:
-            return {"text": "", "confidence": 0.0, "details": [], "error": "EasyOCR not available"}
+            return {"text": "", "confidence": 0.0, "details": [], "error": "EasyOCR not available",
+                    "unavailable": True}
         
         try:
-            results = self.easyocr_reader.readtext(image_path, detail=1, paragraph=True)
-            
-            # Extract text and calculate average confidence
-            text_parts = []
-            confidences = []
-            details = []
-            
-            for bbox, text, confidence in results:
-                if text.strip() and confidence > 0.3:  # Filter low confidence results
-                    text_parts.append(text)
-                    confidences.append(confidence)
-                    details.append({
-                        "text": text,
-                        "confidence": confidence,
-                        "bbox": bbox
-                    })
+            if regions is None:
+                regions = self.detect_easyocr_regions(image)
+            languages = choose_languages(image, regions)
             
-            extracted_text = " ".join(text_parts)
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            # Recognize the regions directly, skipping EasyOCR's own detector;
+            # paragraph=True would merge lines and drop the per-line confidence we need
+            horizontal_list = [[x0, x1, y0, y1] for x0, y0, x1, y1 in regions]
+            results = self.readers.get(languages).recognize(
+                image, horizontal_list=horizontal_list, free_list=[], detail=1, paragraph=False
+            ) if horizontal_list else []
             
-            return {
-                "text": extracted_text,
-                "confidence": avg_confidence,
-                "details": details,
-                "engine": "easyocr"
-            }
+            result = self.summarize_easyocr(results)
+            result["languages"] = list(languages)
+            return result
             
         except Exception as e:
             logger.error(f"EasyOCR extraction failed: {e}")
             return {"text": "", "confidence": 0.0, "details": [], "error": str(e)}
     
-    def extract_with_tesseract(self, image_path: str) -> Dict[str, Any]:
-        """Extract text using Tesseract OCR"""
+    def detect_easyocr_regions(self, image: np.ndarray) -> List[List[int]]:
+        """Text boxes [x0, y0, x1, y1] found by EasyOCR's own detector"""
+        horizontal_list, _ = self.easyocr_reader.detect(image)
+        # Detected boxes carry a margin that can reach past the image edges
+        regions = clamp_regions([[x0, y0, x1, y1] for x0, x1, y0, y1 in horizontal_list[0]], image.shape)
+        return self.order_regions(regions)
+    
+    def summarize_easyocr(self, results: List[Any]) -> Dict[str, Any]:
+        """Turn raw EasyOCR (bbox, text, confidence) tuples into an engine result"""
+        # Extract text and calculate average confidence
+        text_parts = []
+        confidences = []
+        boxes = []
+        
+        for bbox, text, confidence in results:
+            if text.strip() and confidence > 0.3:  # Filter low confidence results
+                text_parts.append(text)
+                confidences.append(float(confidence))
+                # Boxes come from horizontal regions, so their corners reduce to [x0, y0, x1, y1]
+                xs = [point[0] for point in bbox]
+                ys = [point[1] for point in bbox]
+                boxes.append((min(xs), min(ys), max(xs), max(ys)))
+        
+        details = WordResults(text_parts, confidences, boxes)
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        return {
+            "text": details.text,
+            "confidence": avg_confidence,
+            "details": details,
+            "engine": "easyocr"
+        }
+    
+    def extract_with_tesseract(self, image: np.ndarray,
+                               regions: Optional[List[List[int]]] = None) -> Dict[str, Any]:
+        """Extract text using Tesseract OCR, limited to the given text regions when provided"""
         if not self.tesseract_available:
-            return {"text": "", "confidence": 0.0, "details": [], "error": "Tesseract not available"}
+            return {"text": "", "confidence": 0.0, "details": [], "error": "Tesseract not available",
+                    "unavailable": True}
         
         try:
-            # Open image with PIL
-            image = Image.open(image_path)
+            placements = None
+            if regions is not None:
+                if not regions:
+                    return {"text": "", "confidence": 0.0, "details": [], "engine": "tesseract"}
+                # One Tesseract call over the text lines packed together, without the margins
+                image, placements = self.build_line_mosaic(image, regions)
             
             # Extract text with confidence data
-            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+            data = self.tesseract_engine.image_to_data(image)
             
             # Filter and combine results
             text_parts = []
             confidences = []
-            details = []
+            boxes = []
             
             for i in range(len(data['text'])):
                 text = data['text'][i].strip()
                 conf = int(data['conf'][i])
                 
                 if text and conf > 30:  # Filter low confidence results
+                    bbox = [data['left'][i], data['top'][i], 
+                            data['left'][i] + data['width'][i], 
+                            data['top'][i] + data['height'][i]]
+                    if placements:
+                        bbox = self.map_mosaic_box(bbox, placements)
                     text_parts.append(text)
                     confidences.append(conf / 100.0)  # Convert to 0-1 scale
-                    details.append({
-                        "text": text,
-                        "confidence": conf / 100.0,
-                        "bbox": [data['left'][i], data['top'][i], 
-                               data['left'][i] + data['width'][i], 
-                               data['top'][i] + data['height'][i]]
-                    })
+                    boxes.append(bbox)
             
-            extracted_text = " ".join(text_parts)
+            details = WordResults(text_parts, confidences, boxes)
             avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
             
             return {
-                "text": extracted_text,
+                "text": details.text,
                 "confidence": avg_confidence,
                 "details": details,
                 "engine": "tesseract"
@@ -164,75 +516,135 @@ class EnhancedOCRService:
             logger.error(f"Tesseract extraction failed: {e}")
             return {"text": "", "confidence": 0.0, "details": [], "error": str(e)}
     
-    def extract_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
+    def detect_text_regions(self, image: np.ndarray) -> Optional[List[List[int]]]:
+        """Text boxes [x0, y0, x1, y1] of a preprocessed image, or None to use the full page"""
+        if not SHARED_DETECTION:
+            return None
+        
+        key = (image.shape, hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).hexdigest())
+        with self.region_lock:
+            if key in self.region_cache:
+                self.region_cache.move_to_end(key)
+                return self.region_cache[key]
+        
+        regions = self.find_text_regions(image)
+        
+        with self.region_lock:
+            self.region_cache[key] = regions
+            while len(self.region_cache) > REGION_CACHE_SIZE:
+                self.region_cache.popitem(last=False)
+        return regions
+    
+    def find_text_regions(self, image: np.ndarray) -> Optional[List[List[int]]]:
+        """Find text regions by smearing ink into word and line blobs"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (REGION_MERGE_WIDTH, 3))
+        ink = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        
+        boxes = [[int(x), int(y), int(x + w), int(y + h)] for x, y, w, h, _ in stats[1:]]
+        # Labels follow the raster order of each blob's top pixel; engines need reading order
+        words = self.order_regions(self.merge_fragments(boxes))
+        
+        pad = 4
+        regions = [[max(0, x0 - pad), max(0, y0 - pad), min(width, x1 + pad), min(height, y1 + pad)]
+                   for x0, y0, x1, y1 in words]
+        
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in self.merge_line_bands(regions))
+        if covered > REGION_MAX_COVERAGE * width * height:
+            return None
+        return regions
+    
+    def merge_fragments(self, boxes: List[List[int]]) -> List[List[int]]:
+        """Fold dots, accents and similar marks into the word below or above them, dropping stray ones"""
+        heights = [y1 - y0 for x0, y0, x1, y1 in boxes if y1 - y0 >= 6 and x1 - x0 >= 6]
+        if not heights:
+            return []
+        line_height = float(np.median(heights))
+        
+        words, fragments = [], []
+        for x0, y0, x1, y1 in boxes:
+            if y1 - y0 < REGION_FRAGMENT_HEIGHT * line_height and x1 - x0 < line_height:
+                fragments.append([x0, y0, x1, y1])
+            elif x1 - x0 >= 6 and y1 - y0 >= 6:  # Thin rules are not text
+                words.append([x0, y0, x1, y1])
+        
+        for x0, y0, x1, y1 in fragments:
+            # The nearest word sharing some columns with the mark, within half a line vertically
+            best, best_gap = None, line_height / 2
+            for word in words:
+                if x0 >= word[2] or x1 <= word[0]:
+                    continue
+                gap = max(word[1] - y1, y0 - word[3], 0)
+                if gap <= best_gap:
+                    best, best_gap = word, gap
+            if best is not None:
+                best[0], best[1] = min(best[0], x0), min(best[1], y0)
+                best[2], best[3] = max(best[2], x1), max(best[3], y1)
+        return words
+    
+    def order_regions(self, regions: List[List[int]]) -> List[List[int]]:
+        """Regions in reading order: line band by line band, left to right within each"""
+        bands = self.merge_line_bands(regions)
+        
+        def band_index(region):
+            center = (region[1] + region[3]) / 2
+            for index, (_, y0, _, y1) in enumerate(bands):
+                if center < y1:
+                    return index
+            return len(bands) - 1
+        
+        return sorted(regions, key=lambda region: (band_index(region), region[0]))
+    
+    def merge_line_bands(self, regions: List[List[int]]) -> List[List[int]]:
+        """Merge regions that overlap vertically into full text-line bands"""
+        bands = []
+        for x0, y0, x1, y1 in sorted(regions, key=lambda r: r[1]):
+            if bands and y0 < bands[-1][3]:
+                band = bands[-1]
+                band[0], band[2], band[3] = min(band[0], x0), max(band[2], x1), max(band[3], y1)
+            else:
+                bands.append([x0, y0, x1, y1])
+        return bands
+    
+    def build_line_mosaic(self, image: np.ndarray,
+                          regions: List[List[int]]) -> Tuple[np.ndarray, List[Tuple[int, List[int]]]]:
+        """Stack the text-line bands of an image into one compact image"""
+        gap = MOSAIC_GAP
+        bands = self.merge_line_bands(regions)
+        mosaic_width = max(x1 - x0 for x0, _, x1, _ in bands) + 2 * gap
+        mosaic_height = sum(y1 - y0 + gap for _, y0, _, y1 in bands) + gap
+        mosaic = np.full((mosaic_height, mosaic_width) + image.shape[2:], 255, dtype=image.dtype)
+        
+        placements = []
+        top = gap
+        for band in bands:
+            x0, y0, x1, y1 = band
+            mosaic[top:top + y1 - y0, gap:gap + x1 - x0] = image[y0:y1, x0:x1]
+            placements.append((top, band))
+            top += y1 - y0 + gap
+        
+        return mosaic, placements
+    
+    def map_mosaic_box(self, bbox: List[int], placements: List[Tuple[int, List[int]]]) -> List[int]:
+        """Translate a box found on a line mosaic back to page coordinates"""
+        gap = MOSAIC_GAP
+        center_y = (bbox[1] + bbox[3]) / 2
+        for top, (x0, y0, x1, y1) in placements:
+            if center_y < top + y1 - y0 + gap / 2:
+                dx, dy = x0 - gap, y0 - top
+                return [bbox[0] + dx, bbox[1] + dy, bbox[2] + dx, bbox[3] + dy]
+        return bbox
+    
+    def extract_from_pdf(self, pdf_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Extract text from PDF using both direct text extraction and OCR"""
         try:
-            doc = fitz.open(pdf_path)
-            results = {
-                "pages": [],
-                "total_text": "",
-                "total_confidence": 0.0,
-                "extraction_method": "hybrid"
-            }
-            
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                page_result = {
-                    "page_number": page_num + 1,
-                    "direct_text": "",
-                    "ocr_text": "",
-                    "final_text": "",
-                    "confidence": 0.0
-                }
-                
-                # Try direct text extraction first
-                direct_text = page.get_text().strip()
-                page_result["direct_text"] = direct_text
-                
-                # If direct extraction yields little text, use OCR
-                if len(direct_text) < 50:
-                    # Convert page to image
-                    mat = fitz.Matrix(2, 2)  # Zoom factor for better OCR
-                    pix = page.get_pixmap(matrix=mat)
-                    
-                    # Save as temporary image
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                        pix.save(tmp_file.name)
-                        temp_image_path = tmp_file.name
-                    
-                    try:
-                        # Preprocess and extract with OCR
-                        processed_path = self.preprocess_image(temp_image_path)
-                        ocr_result = self.extract_with_multiple_engines(processed_path)
-                        
-                        page_result["ocr_text"] = ocr_result["text"]
-                        page_result["final_text"] = ocr_result["text"] if len(ocr_result["text"]) > len(direct_text) else direct_text
-                        page_result["confidence"] = ocr_result.get("confidence", 0.5)
-                        
-                        # Clean up temporary files
-                        os.unlink(temp_image_path)
-                        if processed_path != temp_image_path:
-                            os.unlink(processed_path)
-                            
-                    except Exception as e:
-                        logger.error(f"OCR failed for page {page_num + 1}: {e}")
-                        page_result["final_text"] = direct_text
-                        page_result["confidence"] = 0.8 if direct_text else 0.0
-                else:
-                    page_result["final_text"] = direct_text
-                    page_result["confidence"] = 0.9  # High confidence for direct extraction
-                
-                results["pages"].append(page_result)
-                results["total_text"] += page_result["final_text"] + "\n"
-            
-            doc.close()
-            
-            # Calculate overall confidence
-            confidences = [p["confidence"] for p in results["pages"] if p["confidence"] > 0]
-            results["total_confidence"] = sum(confidences) / len(confidences) if confidences else 0.0
-            results["total_text"] = results["total_text"].strip()
-            
-            return results
+            # Page by page, so every page checks what is left of the deadline before its OCR
+            return self.assemble_pdf_result(list(self.iter_pdf_pages(pdf_path, mode, profile, deadline)))
             
         except Exception as e:
             logger.error(f"PDF extraction failed: {e}")
@@ -244,27 +656,240 @@ class EnhancedOCRService:
                 "error": str(e)
             }
     
-    def extract_with_multiple_engines(self, image_path: str) -> Dict[str, Any]:
-        """Extract text using multiple OCR engines and combine results"""
-        results = {}
+    def recognize(self, image: np.ndarray, mode: Optional[str] = None,
+                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run OCR on a preprocessed image using the requested engine strategy"""
+        if (mode or self.mode) == 'cascade':
+            return self.extract_with_cascade(image, deadline)
+        return self.extract_with_multiple_engines(image, deadline)
+    
+    def iter_pdf_pages(self, pdf_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each PDF page result as soon as it is extracted"""
+        self.wait_until_ready()
+        doc = fitz.open(pdf_path)
+        try:
+            for page_num in range(doc.page_count):
+                yield self.extract_pdf_page(doc[page_num], mode, profile, deadline)
+        finally:
+            doc.close()
+    
+    def extract_pdf_page(self, page, mode: Optional[str] = None, profile: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract text from a single PDF page, using OCR when it has no text layer"""
+        page_result, image = self.prepare_pdf_page(page, profile, deadline)
+        if image is not None:
+            try:
+                self.apply_page_ocr(page_result, self.recognize(image, mode, deadline))
+            except Exception as e:
+                self.fail_page_ocr(page_result, e)
+        return page_result
+    
+    def prepare_pdf_page(self, page, profile: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+        """Read a page's text layer, and rasterize and preprocess it if OCR is needed"""
+        page_result = {
+            "page_number": page.number + 1,
+            "direct_text": "",
+            "ocr_text": "",
+            "final_text": "",
+            "confidence": 0.0
+        }
+        
+        # Try direct text extraction first
+        direct_text = page.get_text().strip()
+        page_result["direct_text"] = direct_text
+        
+        # If direct extraction yields enough text, no OCR is needed
+        if len(direct_text) >= 50:
+            page_result["final_text"] = direct_text
+            page_result["confidence"] = 0.9  # High confidence for direct extraction
+            return page_result, None
+        
+        # Out of time: keep whatever text layer the page has and leave it unread
+        if deadline and not deadline.allows(DEADLINE_PAGE_RESERVE):
+            page_result["final_text"] = direct_text
+            page_result["confidence"] = 0.8 if direct_text else 0.0
+            page_result["skipped_stages"] = ["page_ocr"]
+            return page_result, None
+        
+        # Convert page to an in-memory image
+        zoom, colorspace = self.pdf_render_settings(page)
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace)
+        page_result["render"] = {"zoom": round(zoom, 3), "colorspace": colorspace.name}
+        
+        try:
+            processed, preprocessing = self.preprocess_image(self.pixmap_to_array(pix), profile, deadline)
+            page_result["preprocessing"] = preprocessing
+            if preprocessing.get("skipped_stages"):
+                page_result["skipped_stages"] = preprocessing["skipped_stages"]
+            return page_result, processed
+        except Exception as e:
+            self.fail_page_ocr(page_result, e)
+            return page_result, None
+    
+    def apply_page_ocr(self, page_result: Dict[str, Any], ocr_result: Dict[str, Any]):
+        """Record a page's OCR result, keeping the text layer if it is longer"""
+        direct_text = page_result["direct_text"]
+        page_result["ocr_text"] = ocr_result["text"]
+        page_result["final_text"] = ocr_result["text"] if len(ocr_result["text"]) > len(direct_text) else direct_text
+        page_result["confidence"] = ocr_result.get("confidence", 0.5)
+        skipped = merge_skipped_stages(page_result.get("skipped_stages"), ocr_result.get("skipped_stages"))
+        if skipped:
+            page_result["skipped_stages"] = skipped
+        engine_errors = [r["error"] for r in ocr_result.get("all_results", {}).values()
+                         if r.get("error") and not r.get("unavailable")]
+        if engine_errors:
+            page_result["ocr_error"] = "; ".join(engine_errors)
+    
+    def fail_page_ocr(self, page_result: Dict[str, Any], error: Exception):
+        """Fall back to a page's text layer when OCR fails"""
+        logger.error(f"OCR failed for page {page_result['page_number']}: {error}")
+        page_result["ocr_error"] = str(error)
+        direct_text = page_result["direct_text"]
+        page_result["final_text"] = direct_text
+        page_result["confidence"] = 0.8 if direct_text else 0.0
+    
+    def pdf_render_settings(self, page) -> Tuple[float, Any]:
+        """Pick the zoom factor and colorspace for rasterizing a page"""
+        long_side = max(page.rect.width, page.rect.height)
+        if long_side * PDF_ZOOM <= PDF_MAX_RENDER_SIDE:
+            return PDF_ZOOM, fitz.csRGB
+        # Oversized pages: cap the pixel count and skip color, which preprocessing drops anyway
+        return PDF_MAX_RENDER_SIDE / long_side, fitz.csGRAY
+    
+    def assemble_pdf_result(self, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-page results, in page order, into a document result"""
+        pages = sorted(pages, key=lambda p: p["page_number"])
         
-        # Try EasyOCR
-        easyocr_result = self.extract_with_easyocr(image_path)
-        results["easyocr"] = easyocr_result
+        # Calculate overall confidence
+        confidences = [p["confidence"] for p in pages if p["confidence"] > 0]
         
-        # Try Tesseract
-        tesseract_result = self.extract_with_tesseract(image_path)
-        results["tesseract"] = tesseract_result
+        result = {
+            "pages": pages,
+            "total_text": "\n".join(p["final_text"] for p in pages).strip(),
+            "total_confidence": sum(confidences) / len(confidences) if confidences else 0.0,
+            "extraction_method": "hybrid"
+        }
+        skipped = merge_skipped_stages(*(p.get("skipped_stages") for p in pages))
+        if skipped:
+            result["skipped_stages"] = skipped
+            result["unread_pages"] = [p["page_number"] for p in pages if "page_ocr" in p.get("skipped_stages", [])]
+        return result
+    
+    def extract_with_multiple_engines(self, image: np.ndarray,
+                                      deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run OCR engines concurrently and stop at the first confident result"""
+        regions = self.detect_text_regions(image)
+        engines = {
+            self.engine_executor.submit(self.extract_with_easyocr, image, regions): "easyocr",
+            self.engine_executor.submit(self.extract_with_tesseract, image, regions): "tesseract"
+        }
+        results = {}
+        pending = set(engines)
+        early_exit = False
+        skipped_stages = []
+        
+        while pending:
+            # Once one engine has answered, the others may only use what is left of the deadline
+            timeout = deadline.remaining() if deadline and results else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[engines[future]] = future.result()
+            
+            if not done:
+                for future in pending:
+                    future.cancel()
+                skipped_stages.append("second_engine")
+                break
+            
+            # A confident result makes the slower engines unnecessary
+            if pending and any(self.is_confident(r) for r in results.values()):
+                for future in pending:
+                    future.cancel()  # Engines already running finish in the background
+                early_exit = True
+                break
         
         # Choose the best result
-        best_result = self.choose_best_result([easyocr_result, tesseract_result])
+        best_result = self.choose_best_result(list(results.values()))
+        
+        result = {
+            "text": best_result["text"],
+            "confidence": best_result["confidence"],
+            "best_engine": best_result["engine"],
+            "all_results": results,
+            "combined_approach": True,
+            "early_exit": early_exit,
+            "skipped_engines": [engines[f] for f in pending],
+            "text_regions": len(regions) if regions is not None else "full_page"
+        }
+        if skipped_stages:
+            result["skipped_stages"] = skipped_stages
+        return result
+    
+    def is_confident(self, result: Dict[str, Any]) -> bool:
+        """Check whether an engine result clears the early-exit threshold"""
+        return (
+            bool(result.get("text"))
+            and not result.get("error")
+            and result.get("confidence", 0.0) >= self.early_exit_confidence
+        )
+    
+    def extract_with_cascade(self, image: np.ndarray, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run Tesseract first and escalate to EasyOCR only when its result looks weak"""
+        regions = self.detect_text_regions(image)
+        tesseract_result = self.extract_with_tesseract(image, regions)
+        decision = self.cascade_decision(image, tesseract_result)
+        
+        # An escalation that cannot finish in time is skipped; the Tesseract text still stands
+        skipped = (decision["escalated"] and deadline is not None
+                   and not deadline.allows(DEADLINE_ENGINE_RESERVE))
+        
+        results = {"tesseract": tesseract_result}
+        if decision["escalated"] and not skipped:
+            results["easyocr"] = self.extract_with_easyocr(image, regions)
+        
+        result = self.cascade_result(results, decision, regions)
+        if skipped:
+            result["skipped_stages"] = ["second_engine"]
+        return result
+    
+    def cascade_decision(self, image: np.ndarray, tesseract_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide whether a Tesseract result needs a second opinion from EasyOCR"""
+        # Recognized characters per megapixel tell a blank result from a sparse page
+        megapixels = max(image.shape[0] * image.shape[1] / 1_000_000, 1e-6)
+        text_density = len(tesseract_result.get("text", "").replace(" ", "")) / megapixels
+        confidence = tesseract_result.get("confidence", 0.0)
+        
+        if tesseract_result.get("error"):
+            reason = "tesseract_failed"
+        elif confidence < self.cascade_min_confidence:
+            reason = "low_confidence"
+        elif text_density < self.cascade_min_density:
+            reason = "low_text_density"
+        else:
+            reason = None
+        
+        return {
+            "escalated": reason is not None,
+            "reason": reason or "tesseract_confident",
+            "tesseract_confidence": confidence,
+            "text_density": round(text_density, 2)
+        }
+    
+    def cascade_result(self, results: Dict[str, Dict[str, Any]], decision: Dict[str, Any],
+                       regions: Optional[List[List[int]]]) -> Dict[str, Any]:
+        """Combine the engine results of a cascade run"""
+        best_result = self.choose_best_result(list(results.values()))
         
         return {
             "text": best_result["text"],
             "confidence": best_result["confidence"],
             "best_engine": best_result["engine"],
             "all_results": results,
-            "combined_approach": True
+            "combined_approach": decision["escalated"],
+            "text_regions": len(regions) if regions is not None else "full_page",
+            "cascade": decision
         }
     
     def choose_best_result(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -291,26 +916,108 @@ class EnhancedOCRService:
         
         return best_result or valid_results[0]
     
-    def extract_text(self, file_path: str) -> Dict[str, Any]:
+    def extract_text(self, file_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                     use_cache: bool = True, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Main method to extract text from any supported file type"""
+        self.wait_until_ready()
+        if use_cache:
+            return self.extract_cached(file_path, self.extract_text_uncached, mode, profile, deadline)
+        return self.extract_text_uncached(file_path, mode, profile, deadline)
+    
+    def extract_cached(self, file_path: str, extract: Callable[..., Dict[str, Any]],
+                       mode: Optional[str] = None, profile: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Serve a result from the OCR cache, calling extract(file_path, mode, profile, deadline) on a miss"""
+        cache = get_ocr_cache()
+        if cache is None:
+            return extract(file_path, mode, profile, deadline)
+        
+        try:
+            digest = cache.file_digest(file_path)
+        except OSError as e:
+            logger.warning(f"Could not hash {file_path} for OCR cache: {e}")
+            return extract(file_path, mode, profile, deadline)
+        
+        return self.cached_result(cache, digest, lambda: extract(file_path, mode, profile, deadline), mode, profile)
+    
+    def extract_image_cached(self, image: np.ndarray, digest: str, mode: Optional[str] = None,
+                             profile: Optional[str] = None, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """OCR an image the caller has already decoded, cached under the SHA-256 of its file's bytes"""
+        self.wait_until_ready()
+        
+        def extract():
+            try:
+                return self.extract_from_image(image, mode, profile, deadline)
+            except Exception as e:
+                logger.error(f"Text extraction failed: {e}")
+                return {"text": "", "confidence": 0.0, "error": str(e)}
+        
+        cache = get_ocr_cache()
+        if cache is None:
+            return extract()
+        return self.cached_result(cache, digest, extract, mode, profile)
+    
+    def cached_result(self, cache, digest: str, extract: Callable[[], Dict[str, Any]],
+                      mode: Optional[str], profile: Optional[str]) -> Dict[str, Any]:
+        """Cached result for a content digest, running extract() and storing its result on a miss"""
+        key = cache.make_key(digest, self.cache_config(mode, profile))
+        cached = cache.get(key)
+        if cached is not None:
+            # The cache stores JSON, so word details come back as columns until rebuilt
+            return dict(restore_words(cached), cached=True)
+        
+        result = extract()
+        if self.is_cacheable(result):
+            cache.put(key, result)
+        return result
+    
+    def is_cacheable(self, result: Dict[str, Any]) -> bool:
+        """Whether a result is what a full run on healthy engines returns, and so safe to reuse"""
+        # Results cut short by a deadline are not what a full run would return
+        if result.get("error") or result.get("skipped_stages"):
+            return False
+        # An engine that failed may recover, and an empty result is more likely a failure than a blank page
+        if not (result.get("text") or result.get("total_text")) or result.get("best_engine") == "none":
+            return False
+        # Engines that are not installed are part of the cache key rather than failures
+        if any(engine_result.get("error") and not engine_result.get("unavailable")
+               for engine_result in result.get("all_results", {}).values()):
+            return False
+        return not any(page.get("ocr_error") for page in result.get("pages", []))
+    
+    def is_image_file(self, file_path: str) -> bool:
+        """Check whether a file has a supported image extension"""
+        return os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS
+    
+    def cache_config(self, mode: Optional[str] = None, profile: Optional[str] = None) -> Dict[str, Any]:
+        """Settings that change OCR output, used as part of the cache key"""
+        return {
+            "service": "enhanced_ocr",
+            "version": OCR_CACHE_VERSION,
+            "mode": mode or self.mode,
+            "profile": profile or self.preprocessing_profile,
+            "auto_profile_thresholds": [AUTO_DENOISE_NOISE, AUTO_CLEAN_NOISE, AUTO_MIN_SHARPNESS],
+            "resolution": [TARGET_TEXT_HEIGHT, MAX_OCR_MEGAPIXELS, PDF_MAX_RENDER_SIDE],
+            "early_exit_confidence": self.early_exit_confidence,
+            "cascade_thresholds": [self.cascade_min_confidence, self.cascade_min_density],
+            "shared_detection": SHARED_DETECTION,
+            "easyocr": self.easyocr_reader is not None,
+            "languages": [list(OCR_LANGUAGES), OCR_SCRIPT_DETECTION],
+            "orientation_correction": [ORIENTATION_CORRECTION, MAX_SKEW_ANGLE, OSD_MIN_CONFIDENCE, self.osd_enabled()],
+            "tesseract": self.tesseract_engine.lang if self.tesseract_available else None
+        }
+    
+    def extract_text_uncached(self, file_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                              deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract text from any supported file type, bypassing the cache"""
         try:
             file_ext = os.path.splitext(file_path)[1].lower()
             
             if file_ext == '.pdf':
-                return self.extract_from_pdf(file_path)
-            elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']:
-                # Preprocess image for better results
-                processed_path = self.preprocess_image(file_path)
-                result = self.extract_with_multiple_engines(processed_path)
-                
-                # Clean up processed image if different from original
-                if processed_path != file_path:
-                    try:
-                        os.unlink(processed_path)
-                    except:
-                        pass
-                
-                return result
+                return self.extract_from_pdf(file_path, mode, profile, deadline)
+            elif file_ext in IMAGE_EXTENSIONS:
+                # Decode once and keep the whole pipeline in memory
+                return self.extract_from_image(self.load_image(file_path), mode, profile, deadline)
             else:
                 return {
                     "text": "",
@@ -326,21 +1033,49 @@ class EnhancedOCRService:
                 "error": str(e)
             }
     
+    def extract_from_image(self, image: np.ndarray, mode: Optional[str] = None, profile: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Preprocess and recognize an image that is already decoded in memory"""
+        processed, preprocessing = self.preprocess_image(image, profile, deadline)
+        result = self.recognize(processed, mode, deadline)
+        result["preprocessing"] = preprocessing
+        skipped = merge_skipped_stages(preprocessing.get("skipped_stages"), result.get("skipped_stages"))
+        if skipped:
+            result["skipped_stages"] = skipped
+        return result
+    
+    def extract_text_batch(self, file_paths: List[str], mode: Optional[str] = None,
+                           profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract text from several files one after another, each through the cache"""
+        return [self.extract_text(file_path, mode, profile) for file_path in file_paths]
+    
     def get_service_status(self) -> Dict[str, Any]:
         """Get status of OCR service"""
+        cache = get_ocr_cache()
         return {
             "easyocr_available": self.easyocr_reader is not None,
             "tesseract_available": self.tesseract_available,
+            "tesseract": self.tesseract_engine.get_status() if self.tesseract_engine else None,
             "supported_formats": [".pdf", ".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif"],
-            "supported_languages": ["en", "hi"],
+            "supported_languages": list(OCR_LANGUAGES),
+            "easyocr_readers": self.readers.get_stats(),
             "preprocessing_enabled": True,
+            "preprocessing_profile": self.preprocessing_profile,
+            "available_profiles": list(PREPROCESSING_PROFILES),
             "multi_engine_support": True,
+            "ocr_mode": self.mode,
+            "available_modes": list(OCR_MODES),
+            "cache": cache.get_stats() if cache else {"enabled": False},
+            "engines_ready": self.ready.is_set(),
             "service_ready": self.easyocr_reader is not None or self.tesseract_available
         }
 
-# Create global instance
-ocr_service = EnhancedOCRService()
+# Global instance, created on first use
+ocr_service = None
 
 def get_ocr_service():
     """Get the global OCR service instance"""
+    global ocr_service
+    if ocr_service is None:
+        ocr_service = EnhancedOCRService()
     return ocr_service
\ No newline at end of file
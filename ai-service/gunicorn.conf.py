@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration for BharatChain AI Service
+Loads every model once in the master process and forks workers that share the weights copy-on-write
+
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import gc
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+bind = os.environ.get('AI_SERVICE_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('AI_SERVICE_WORKERS', '2'))
+timeout = int(os.environ.get('AI_SERVICE_TIMEOUT', '120'))
+
+# Import app.py (and with it every model) in the master before forking
+preload_app = True
+
+
+def when_ready(server):
+    """Finish loading the models in the master and freeze the heap before workers are forked"""
+    import app
+
+    if app.ocr_service is not app.get_ocr_service():
+        server.log.warning("OCR_WORKERS is set: its process pool does not survive forking, set it to 0 with gunicorn")
+
+    # Engines load on a background thread, which must finish before fork
+    app.get_ocr_service().ready.wait()
+
+    # Move every object that exists now out of the collector's reach, so collections in
+    # the workers never write to (and so never un-share) the pages holding the models
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Models loaded, {gc.get_freeze_count()} objects frozen before forking workers")
+
+
+def post_fork(server, worker):
+    """Restart the per-process pieces that do not survive fork"""
+    import app
+
+    # Threads are not inherited, so each worker needs its own engine thread pool and job workers
+    app.get_ocr_service().start_engine_executor()
+    app.get_job_queue(app.JOB_HANDLERS)
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    except ImportError:
+        pass
@@ -0,0 +1,327 @@
+"""
+Job Queue for BharatChain AI Service
+SQLite-backed queue of OCR and document analysis jobs, processed by background threads
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import ipaddress
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from ocr_words import json_default
+
+logger = logging.getLogger(__name__)
+
+# Queue database and the uploads waiting in it survive restarts
+JOBS_DIR = os.environ.get('AI_JOBS_DIR', 'jobs')
+JOBS_DB = os.environ.get('AI_JOBS_DB', os.path.join(JOBS_DIR, 'jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', '2'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('AI_JOB_MAX_ATTEMPTS', '2'))
+JOB_RETENTION_HOURS = float(os.environ.get('AI_JOB_RETENTION_HOURS', '24'))
+JOB_POLL_SECONDS = 1.0  # picks up jobs queued by other processes sharing the database
+
+# Completion callbacks
+JOB_CALLBACK_TIMEOUT = float(os.environ.get('AI_JOB_CALLBACK_TIMEOUT', '10'))
+JOB_CALLBACK_RETRIES = 3
+# Comma-separated hosts callbacks may be sent to. When empty, any host is allowed
+# except one resolving to a private, loopback, link-local or otherwise internal address
+JOB_CALLBACK_HOSTS = [h.strip() for h in os.environ.get('AI_JOB_CALLBACK_HOSTS', '').split(',') if h.strip()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_name TEXT,
+    options TEXT,
+    callback_url TEXT,
+    callback_status TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+def validate_callback_url(url: str) -> Optional[str]:
+    """Reason a callback URL is not acceptable, or None when it is"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return "Callback URL must be an http(s) URL"
+    if JOB_CALLBACK_HOSTS:
+        if parsed.hostname not in JOB_CALLBACK_HOSTS:
+            return f"Callback host not allowed: {parsed.hostname}"
+        return None
+
+    # Without an allow-list, results must not reach metadata endpoints or internal services
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or None)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        return f"Callback host could not be resolved: {parsed.hostname}"
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if not ip.is_global or ip.is_multicast:
+            return f"Callback host resolves to a non-public address: {parsed.hostname}"
+    return None
+
+
+class JobQueue:
+    """Durable job queue with a pool of worker threads"""
+
+    def __init__(self, handlers: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]],
+                 db_path: Optional[str] = None, workers: Optional[int] = None):
+        """Open the queue database; handlers map a job kind to fn(file_path, options) -> result"""
+        self.handlers = handlers
+        self.db_path = db_path or JOBS_DB
+        self.workers = JOB_WORKERS if workers is None else workers
+        self.files_dir = os.path.join(os.path.dirname(self.db_path) or '.', 'files')
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.local = threading.local()
+        self.wakeup = threading.Condition()
+        self.threads = []
+
+        # Uploads and results are identity documents, so only the service user may read them
+        os.makedirs(self.files_dir, mode=0o700, exist_ok=True)
+        if not os.path.exists(self.db_path):
+            os.close(os.open(self.db_path, os.O_WRONLY | os.O_CREAT, 0o600))  # SQLite's side files copy its mode
+        db = self._db()
+        db.executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            self.local.db = db
+        return db
+
+    def start(self):
+        """Requeue jobs orphaned by a previous run, purge old ones and start the workers"""
+        # Ownership is per process, so forked workers start with their own
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.local = threading.local()
+        self._recover()
+        self._purge()
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"✅ Job queue started with {self.workers} workers ({self.db_path})")
+
+    def submit(self, kind: str, file_path: str, file_name: str,
+               options: Optional[Dict[str, Any]] = None, callback_url: Optional[str] = None) -> str:
+        """Queue a job for an uploaded file, taking ownership of the file"""
+        job_id = uuid.uuid4().hex
+        stored_path = os.path.join(self.files_dir, f"{job_id}_{os.path.basename(file_path)}")
+        os.replace(file_path, stored_path)
+
+        self._db().execute(
+            "INSERT INTO jobs (id, kind, status, file_path, file_name, options, callback_url, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+            (job_id, kind, stored_path, file_name, json.dumps(options or {}), callback_url, time.time())
+        )
+        with self.wakeup:
+            self.wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job, including its result once finished"""
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row["id"],
+            "type": row["kind"],
+            "status": row["status"],
+            "file_name": row["file_name"],
+            "attempts": row["attempts"],
+            "created_at": self._timestamp(row["created_at"]),
+            "started_at": self._timestamp(row["started_at"]),
+            "finished_at": self._timestamp(row["finished_at"])
+        }
+        if row["status"] == 'queued':
+            job["queued_ahead"] = self._db().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (row["created_at"],)
+            ).fetchone()[0]
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        if row["callback_url"]:
+            job["callback_status"] = row["callback_status"] or "pending"
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counts by status"""
+        rows = self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {
+            "workers": self.workers,
+            "jobs": {status: count for status, count in rows}
+        }
+
+    def _work(self):
+        """Worker thread: claim and run queued jobs until the process exits"""
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"Could not claim a job: {e}")
+                job = None
+            if job is None:
+                with self.wakeup:
+                    self.wakeup.wait(JOB_POLL_SECONDS)
+                continue
+            self._run(job)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically mark the oldest queued job as running and return it"""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (self.owner, time.time(), row["id"])
+                )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return row
+
+    def _run(self, job: sqlite3.Row):
+        """Run one job, record its outcome and notify its callback"""
+        attempt = job["attempts"] + 1
+        logger.info(f"Running {job['kind']} job {job['id']} (attempt {attempt})")
+        try:
+            handler = self.handlers[job["kind"]]
+            result = handler(job["file_path"], json.loads(job["options"] or '{}'))
+            self._finish(job, 'completed', result=json.dumps(result, default=json_default))
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            if attempt < JOB_MAX_ATTEMPTS:
+                self._db().execute("UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ?", (job["id"],))
+                return
+            self._finish(job, 'failed', error=str(e))
+
+        if job["callback_url"]:
+            self._send_callback(job["id"], job["callback_url"])
+
+    def _finish(self, job: sqlite3.Row, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        """Store a job's outcome and drop its upload"""
+        self._db().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, time.time(), job["id"])
+        )
+        try:
+            os.unlink(job["file_path"])
+        except OSError:
+            pass
+
+    def _send_callback(self, job_id: str, url: str):
+        """POST the finished job to its callback URL, retrying with backoff"""
+        payload = self.get(job_id)
+        status = "failed"
+        # Checked again because the host may resolve elsewhere by now
+        reason = validate_callback_url(url)
+        if reason:
+            logger.warning(f"⚠️ Callback for job {job_id} not sent: {reason}")
+            self._db().execute("UPDATE jobs SET callback_status = ? WHERE id = ?", ("blocked", job_id))
+            return
+        for attempt in range(JOB_CALLBACK_RETRIES):
+            try:
+                # Redirects are not followed, so a checked host cannot forward the results inward
+                response = requests.post(url, json=payload, timeout=JOB_CALLBACK_TIMEOUT, allow_redirects=False)
+                if response.status_code < 500:
+                    status = "delivered" if response.ok else f"rejected ({response.status_code})"
+                    break
+            except requests.RequestException as e:
+                logger.warning(f"⚠️ Callback for job {job_id} failed: {e}")
+            time.sleep(2 ** attempt)
+        self._db().execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+
+    def _recover(self):
+        """Requeue running jobs whose owning process is gone, failing those out of attempts"""
+        hostname = socket.gethostname()
+        rows = self._db().execute("SELECT * FROM jobs WHERE status = 'running'").fetchall()
+        # A job claimed under our own owner id belongs to an earlier process that had the same PID
+        orphaned = [row for row in rows
+                    if row["owner"] == self.owner or not self._owner_alive(row["owner"], hostname)]
+        requeued = 0
+        for job in orphaned:
+            # A job that keeps taking its process down (out of memory, native crash) is not retried forever
+            if job["attempts"] >= JOB_MAX_ATTEMPTS:
+                logger.error(f"Job {job['id']} failed: interrupted on each of {job['attempts']} attempts")
+                self._finish(job, 'failed', error=f"Job was interrupted on each of {job['attempts']} attempts")
+                if job["callback_url"]:
+                    threading.Thread(target=self._send_callback, args=(job["id"], job["callback_url"]),
+                                     name=f"job-callback-{job['id']}", daemon=True).start()
+                continue
+            self._db().execute("UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ?", (job["id"],))
+            requeued += 1
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+
+    @staticmethod
+    def _owner_alive(owner: Optional[str], hostname: str) -> bool:
+        """Whether the process that claimed a job still exists on this host"""
+        host, _, pid = (owner or '').rpartition(':')
+        if host != hostname or not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _purge(self):
+        """Delete finished jobs older than the retention period"""
+        cutoff = time.time() - JOB_RETENTION_HOURS * 3600
+        self._db().execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?", (cutoff,)
+        )
+
+    @staticmethod
+    def _timestamp(value: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(value).isoformat() if value else None
+
+
+# Global queue, created and started on first use
+job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue(handlers: Optional[Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]]] = None) -> JobQueue:
+    """Get the global job queue, starting its workers on first use"""
+    global job_queue
+    with _job_queue_lock:
+        if job_queue is None:
+            job_queue = JobQueue(handlers or {})
+            job_queue.start()
+    return job_queue
@@ -0,0 +1,85 @@
+"""
+Memory Report for BharatChain AI Service
+Shows how much of each worker's memory is shared with its siblings and how much is private
+
+Usage: python memory_report.py <master pid> [--watch SECONDS]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List
+
+# Fields of /proc/<pid>/smaps_rollup, in kB
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_rollup(pid: int) -> Dict[str, int]:
+    """Memory totals of a process from /proc/<pid>/smaps_rollup, in kB"""
+    totals = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in FIELDS:
+                totals[name] = int(value.split()[0])
+    return totals
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process"""
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        try:
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return sorted(set(children))
+
+
+def report(master_pid: int):
+    """Print shared and private memory of the master and each worker"""
+    rows = [('master', master_pid)] + [('worker', pid) for pid in child_pids(master_pid)]
+    header = f"{'role':<8}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'shared MB':>11}{'private MB':>12}{'shared %':>10}"
+    print(header)
+    print('-' * len(header))
+
+    total_rss = total_pss = 0
+    for role, pid in rows:
+        try:
+            mem = read_rollup(pid)
+        except OSError:
+            continue
+        shared = mem.get('Shared_Clean', 0) + mem.get('Shared_Dirty', 0)
+        private = mem.get('Private_Clean', 0) + mem.get('Private_Dirty', 0)
+        rss = mem.get('Rss', 0)
+        total_rss += rss
+        total_pss += mem.get('Pss', 0)
+        print(f"{role:<8}{pid:>8}{rss / 1024:>10.1f}{mem.get('Pss', 0) / 1024:>10.1f}"
+              f"{shared / 1024:>11.1f}{private / 1024:>12.1f}{100 * shared / max(rss, 1):>9.1f}%")
+
+    # PSS splits shared pages between their users, so its sum is the real footprint
+    print('-' * len(header))
+    print(f"sum of RSS: {total_rss / 1024:.1f} MB, actual footprint (sum of PSS): {total_pss / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report shared vs private memory of prefork workers')
+    parser.add_argument('pid', type=int, help='PID of the gunicorn master process')
+    parser.add_argument('--watch', type=float, default=0, help='repeat every N seconds')
+    args = parser.parse_args()
+
+    if not os.path.exists(f'/proc/{args.pid}/smaps_rollup'):
+        sys.exit(f"No smaps_rollup for PID {args.pid} (needs Linux 4.14+ and access to the process)")
+
+    while True:
+        report(args.pid)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+OCR Result Cache for BharatChain
+Content-addressed cache of OCR results with an in-memory LRU and an on-disk tier
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from ocr_words import json_default
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+OCR_CACHE_ENABLED = os.environ.get('OCR_CACHE_ENABLED', '1') != '0'
+OCR_CACHE_DIR = os.environ.get('OCR_CACHE_DIR', os.path.join('cache', 'ocr'))
+OCR_CACHE_MEMORY_ENTRIES = int(os.environ.get('OCR_CACHE_MEMORY_ENTRIES', '256'))
+OCR_CACHE_MAX_DISK_BYTES = int(os.environ.get('OCR_CACHE_MAX_DISK_BYTES', str(256 * 1024 * 1024)))
+# Part of every cache key; bump it when a code change alters OCR output so old entries stop matching
+OCR_CACHE_VERSION = 1
+
+
+class OCRResultCache:
+    """Two-tier cache of OCR results keyed by file content and OCR configuration"""
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 memory_entries: Optional[int] = None,
+                 max_disk_bytes: Optional[int] = None):
+        """Set up both cache tiers"""
+        self.cache_dir = cache_dir or OCR_CACHE_DIR
+        self.memory_entries = OCR_CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        self.max_disk_bytes = OCR_CACHE_MAX_DISK_BYTES if max_disk_bytes is None else max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+        # Entries hold text read from identity documents, so only the service user may read them
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        self.disk_bytes = sum(entry.stat().st_size for entry in self._disk_entries())
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """SHA-256 of a file's bytes"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(content_digest: str, config: Dict[str, Any]) -> str:
+        """Combine a content digest with the OCR configuration that produced the result"""
+        config_json = json.dumps(config, sort_keys=True)
+        return hashlib.sha256(f"{content_digest}:{config_json}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look a result up in memory, then on disk"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self.memory[key]
+
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+        except (OSError, ValueError):
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self.lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result in both tiers"""
+        data = json.dumps(value, default=json_default).encode('utf-8')
+        value = json.loads(data)  # Keep the memory tier identical to what disk returns
+
+        with self.lock:
+            self.stats["stores"] += 1
+            self._remember(key, value)
+
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry: {e}")
+            return
+
+        with self.lock:
+            self.disk_bytes += len(data)
+            over_limit = self.disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+            stats["disk_bytes"] = self.disk_bytes
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        """Insert into the memory tier, dropping least recently used entries (lock held)"""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _disk_entries(self):
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith('.json')]
+
+    def _evict_disk(self):
+        """Remove least recently used files until the disk tier fits its size limit"""
+        # Other processes share the directory, so work from what is actually on disk
+        entries = sorted(self._disk_entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        target = self.max_disk_bytes * 0.9  # Leave headroom so every write does not rescan
+        evicted = 0
+
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+
+        with self.lock:
+            self.disk_bytes = total
+            self.stats["evictions"] += evicted
+
+
+# Global cache, created on first use
+ocr_cache = None
+
+
+def get_ocr_cache() -> Optional[OCRResultCache]:
+    """Get the global OCR result cache, or None when caching is disabled"""
+    global ocr_cache
+    if ocr_cache is None and OCR_CACHE_ENABLED:
+        ocr_cache = OCRResultCache()
+    return ocr_cache
+
@@ -0,0 +1,164 @@
+"""
+OCR Language Selection for BharatChain
+Chooses EasyOCR languages per image from the script on the page and keeps one reader per language set
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import easyocr
+
+logger = logging.getLogger(__name__)
+
+# Full language set, loaded when the script is Devanagari or cannot be told apart
+OCR_LANGUAGES = tuple(os.environ.get('OCR_LANGUAGES', 'en,hi').split(','))
+# Languages used for pages without Devanagari text
+LATIN_LANGUAGES = ('en',)
+OCR_SCRIPT_DETECTION = os.environ.get('OCR_SCRIPT_DETECTION', '1') != '0'
+OCR_READER_CACHE_SIZE = int(os.environ.get('OCR_READER_CACHE_SIZE', '3'))
+
+# Devanagari words hang from a headline (shirorekha): one ink row, high in the word,
+# filled across most of it and far denser than the rows around it
+HEADLINE_MIN_FILL = 0.75
+HEADLINE_MIN_PEAK_RATIO = 2.0
+# Share of measurable text boxes with a headline that marks a page as Devanagari
+DEVANAGARI_MIN_SHARE = 0.2
+MIN_SCRIPT_BOXES = 3
+
+
+def has_headline(box: np.ndarray) -> bool:
+    """Whether a grayscale text box shows a Devanagari-style headline"""
+    if box.size == 0:
+        return False
+    _, ink = cv2.threshold(box, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    columns = np.flatnonzero(ink.any(axis=0))
+    rows = np.flatnonzero(ink.any(axis=1))
+    if len(columns) < 8 or len(rows) < 8:
+        return False
+    ink = ink[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+
+    fill = ink.mean(axis=1)
+    peak = int(fill.argmax())
+    return (
+        peak < len(fill) * 0.5
+        and fill[peak] >= HEADLINE_MIN_FILL
+        and fill[peak] >= HEADLINE_MIN_PEAK_RATIO * max(float(np.median(fill)), 1e-3)
+    )
+
+
+def detect_script(image: np.ndarray, boxes: List[List[int]]) -> Optional[str]:
+    """'devanagari' or 'latin' for an image and its [x0, y0, x1, y1] text boxes, None when unsure"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    measured = headlines = 0
+    for x0, y0, x1, y1 in boxes:
+        # Short boxes are single characters or punctuation and say little about the script
+        if y1 - y0 < 10 or x1 - x0 < 2 * (y1 - y0):
+            continue
+        measured += 1
+        headlines += has_headline(gray[y0:y1, x0:x1])
+
+    if measured < MIN_SCRIPT_BOXES:
+        return None
+    return 'devanagari' if headlines >= DEVANAGARI_MIN_SHARE * measured else 'latin'
+
+
+def choose_languages(image: np.ndarray, boxes: List[List[int]]) -> Tuple[str, ...]:
+    """EasyOCR languages for an image: English only when no Devanagari is found"""
+    if not OCR_SCRIPT_DETECTION or detect_script(image, boxes) != 'latin':
+        return OCR_LANGUAGES
+    return LATIN_LANGUAGES
+
+
+class EasyOCRReaders:
+    """Small LRU of EasyOCR readers keyed by language set"""
+
+    def __init__(self, languages: Optional[Tuple[str, ...]] = None, max_readers: Optional[int] = None):
+        """Create an empty reader cache around the full language set"""
+        self.languages = tuple(languages or OCR_LANGUAGES)
+        self.max_readers = OCR_READER_CACHE_SIZE if max_readers is None else max_readers
+        self.default = None
+        self.readers = OrderedDict()
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        # One lock per language set being loaded, so a model is loaded once without blocking other sets
+        self.loading = {}
+        self.stats = {"hits": 0, "loads": 0, "failures": 0}
+
+    def load_default(self):
+        """Load the full-language reader, which also owns the text detector, unless already loaded"""
+        with self.load_lock:
+            if self.default is None:
+                self.default = easyocr.Reader(list(self.languages), gpu=False)
+        # Load the script readers too, so forked workers inherit them instead of each loading its own
+        if OCR_SCRIPT_DETECTION:
+            self.get(LATIN_LANGUAGES)
+        return self.default
+
+    def get(self, languages: Tuple[str, ...]):
+        """Reader for a language set, loading it on first use and falling back to the default"""
+        if self.default is None or tuple(languages) == self.languages:
+            return self.default
+
+        with self.lock:
+            reader = self._cached(languages)
+            if reader is not None:
+                return reader
+            load_lock = self.loading.setdefault(languages, threading.Lock())
+
+        # Loading takes seconds, so requests for other language sets must not wait behind it
+        with load_lock:
+            with self.lock:
+                reader = self._cached(languages)
+                if reader is not None:
+                    return reader
+            try:
+                # Detection always runs on the default reader, so only the recognizer is loaded
+                reader = easyocr.Reader(list(languages), gpu=False, detector=False)
+            except Exception as e:
+                logger.warning(f"⚠️ EasyOCR reader for {languages} failed to load: {e}")
+                with self.lock:
+                    self.stats["failures"] += 1
+                return self.default
+
+            with self.lock:
+                self.stats["loads"] += 1
+                self.readers[languages] = reader
+                while len(self.readers) > self.max_readers:
+                    self.readers.popitem(last=False)
+            return reader
+
+    def _cached(self, languages: Tuple[str, ...]):
+        """Loaded reader for a language set, or None; the caller holds self.lock"""
+        if languages not in self.readers:
+            return None
+        self.readers.move_to_end(languages)
+        self.stats["hits"] += 1
+        return self.readers[languages]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded language sets and cache counters"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["loaded"] = [list(self.languages)] if self.default else []
+            stats["loaded"] += [list(languages) for languages in self.readers]
+        stats["script_detection"] = OCR_SCRIPT_DETECTION
+        return stats
+
+
+# Readers shared by everything in the process that runs EasyOCR, so each model is loaded once
+easyocr_readers = None
+_easyocr_readers_lock = threading.Lock()
+
+
+def get_easyocr_readers() -> EasyOCRReaders:
+    """Get the process-wide EasyOCR reader cache"""
+    global easyocr_readers
+    with _easyocr_readers_lock:
+        if easyocr_readers is None:
+            easyocr_readers = EasyOCRReaders()
+    return easyocr_readers
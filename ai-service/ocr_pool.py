@@ -0,0 +1,237 @@
+"""
+OCR Worker Pool for BharatChain
+Dispatches OCR requests to a pool of warm worker processes
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Iterator, List, Optional
+
+import fitz  # PyMuPDF
+
+from enhanced_ocr import get_ocr_service, Deadline
+
+logger = logging.getLogger(__name__)
+
+# Number of OCR worker processes (0 keeps OCR in the request thread)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', '0'))
+
+# Pages of one PDF being rasterized or OCR'd at once (0 means one per worker)
+OCR_MAX_INFLIGHT_PAGES = int(os.environ.get('OCR_MAX_INFLIGHT_PAGES', '0'))
+
+# OCR service owned by the current worker process
+_worker_service = None
+
+
+def _init_worker(torch_threads: int):
+    """Prepare the warm OCR service held by a worker process"""
+    global _worker_service
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_service = get_ocr_service()
+    _worker_service.start_engine_executor()
+
+
+def _worker_ping(_: int) -> int:
+    """No-op task used to start worker processes eagerly"""
+    return os.getpid()
+
+
+def _worker_extract_text(file_path: str, mode: Optional[str], profile: Optional[str],
+                         deadline: Optional[Deadline]) -> Dict[str, Any]:
+    """Run a full text extraction inside a worker process"""
+    # The parent process owns the result cache
+    return _worker_service.extract_text(file_path, mode, profile, use_cache=False, deadline=deadline)
+
+
+def _worker_extract_pdf_page(pdf_path: str, page_index: int, mode: Optional[str],
+                             profile: Optional[str], deadline: Optional[Deadline]) -> Dict[str, Any]:
+    """Rasterize and OCR a single PDF page inside a worker process"""
+    doc = fitz.open(pdf_path)
+    try:
+        return _worker_service.extract_pdf_page(doc[page_index], mode, profile, deadline)
+    finally:
+        doc.close()
+
+
+class OCRWorkerPool:
+    """Pool of OCR worker processes, each with its own warm engines"""
+
+    def __init__(self, workers: Optional[int] = None, max_inflight_pages: Optional[int] = None):
+        """Start the worker processes"""
+        self.workers = workers or OCR_WORKERS or os.cpu_count() or 1
+        self.max_inflight_pages = max_inflight_pages or OCR_MAX_INFLIGHT_PAGES or self.workers
+        self.lock = threading.Lock()
+        self.restarts = 0
+
+        # Workers are forked so they inherit the engines already loaded here,
+        # which also keeps the fork clear of the background loading thread
+        get_ocr_service().ready.wait()
+        # Fork all workers now, before the web server starts its threads
+        self.executor = self._start_executor()
+        logger.info(f"✅ OCR worker pool started with {self.workers} workers")
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        """Create the worker processes and wait until each is running"""
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(torch_threads,)
+        )
+        list(executor.map(_worker_ping, range(self.workers)))
+        return executor
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace an executor whose worker died (e.g. killed for memory), unless another thread already did"""
+        with self.lock:
+            if self.executor is not broken:
+                return
+            logger.error("❌ An OCR worker process died, restarting the worker pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start_executor()
+            self.restarts += 1
+
+    def _run(self, fn, *args):
+        """Run a task on a worker, retrying it once on a fresh pool if a worker process died"""
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt:
+                    raise
+
+    def extract_text(self, file_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                     use_cache: bool = True, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract text on whichever worker is idle"""
+        if use_cache:
+            return get_ocr_service().extract_cached(file_path, self.extract_text_uncached, mode, profile, deadline)
+        return self.extract_text_uncached(file_path, mode, profile, deadline)
+
+    def extract_text_uncached(self, file_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                              deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract text on the workers, bypassing the cache"""
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            return self.extract_from_pdf(file_path, mode, profile, deadline)
+
+        try:
+            return self._run(_worker_extract_text, file_path, mode, profile, deadline)
+        except Exception as e:
+            logger.error(f"OCR worker failed: {e}")
+            return {
+                "text": "",
+                "confidence": 0.0,
+                "error": str(e)
+            }
+
+    def extract_text_batch(self, file_paths: List[str], mode: Optional[str] = None,
+                           profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract text from several files one after another, each through the cache"""
+        return [self.extract_text(file_path, mode, profile) for file_path in file_paths]
+
+    def iter_pdf_pages(self, pdf_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                       deadline: Optional[Deadline] = None) -> Iterator[Dict[str, Any]]:
+        """Fan PDF pages out across the workers, yielding each page as it finishes"""
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+
+        def submit(page_index):
+            executor = self.executor
+            future = executor.submit(_worker_extract_pdf_page, pdf_path, page_index, mode, profile, deadline)
+            pending[future] = (page_index, executor)
+
+        next_page = 0
+        pending = {}  # future -> (page index, executor it was submitted to)
+        suspects = []  # pages in flight when a worker died, retried one at a time
+        retried = set()
+        try:
+            while next_page < page_count or pending or suspects:
+                if suspects:
+                    # Alone on the pool, a page that kills its worker again is the one to blame
+                    if not pending:
+                        submit(suspects.pop(0))
+                else:
+                    # Workers rasterize their own page, so this also caps decoded pages in memory
+                    while next_page < page_count and len(pending) < self.max_inflight_pages:
+                        submit(next_page)
+                        next_page += 1
+
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_index, executor = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        self._restart(executor)
+                        if page_index not in retried:
+                            retried.add(page_index)
+                            suspects.append(page_index)
+                            continue
+                        result = {
+                            "page_number": page_index + 1,
+                            "direct_text": "",
+                            "ocr_text": "",
+                            "final_text": "",
+                            "confidence": 0.0,
+                            "ocr_error": "OCR worker process died on this page"
+                        }
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def extract_from_pdf(self, pdf_path: str, mode: Optional[str] = None, profile: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract text from all PDF pages in parallel and reassemble them in page order"""
+        try:
+            pages = list(self.iter_pdf_pages(pdf_path, mode, profile, deadline))
+            return get_ocr_service().assemble_pdf_result(pages)
+        except Exception as e:
+            logger.error(f"Parallel PDF extraction failed: {e}")
+            return {
+                "pages": [],
+                "total_text": "",
+                "total_confidence": 0.0,
+                "extraction_method": "failed",
+                "error": str(e)
+            }
+
+    def get_service_status(self) -> Dict[str, Any]:
+        """Get status of the OCR service and its worker pool"""
+        status = get_ocr_service().get_service_status()
+        status["worker_pool"] = {
+            "enabled": True,
+            "workers": self.workers,
+            "max_inflight_pages": self.max_inflight_pages,
+            "restarts": self.restarts
+        }
+        return status
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        self.executor.shutdown(wait=True)
+
+
+# Global pool, created on first use
+ocr_pool = None
+
+
+def get_ocr_pool() -> Optional[OCRWorkerPool]:
+    """Get the global OCR worker pool, or None when pooling is disabled"""
+    global ocr_pool
+    if ocr_pool is None and OCR_WORKERS > 0:
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning("⚠️ OCR worker pool needs fork support, running OCR in-process")
+            return None
+        ocr_pool = OCRWorkerPool(OCR_WORKERS)
+    return ocr_pool
@@ -0,0 +1,99 @@
+"""
+OCR Word Results for BharatChain
+Stores the words recognized on a page column-wise instead of as one dict per word
+"""
+
+from array import array
+from typing import Dict, Any, Iterator, Optional, Sequence
+
+
+class WordResults:
+    """Words of one engine result: their joined text plus parallel arrays of spans, confidences and boxes"""
+
+    __slots__ = ('text', 'spans', 'confidences', 'boxes')
+
+    def __init__(self, words: Sequence[str] = (), confidences: Sequence[float] = (),
+                 boxes: Sequence[Sequence[int]] = ()):
+        """Pack words with their 0-1 confidences and [x0, y0, x1, y1] boxes"""
+        # Words are joined by single spaces, which makes this text the engine result's text
+        self.text = " ".join(words)
+        self.spans = array('I')  # start and end of each word in text
+        position = 0
+        for word in words:
+            self.spans.extend((position, position + len(word)))
+            position += len(word) + 1
+        self.confidences = array('f', confidences)
+        self.boxes = array('i')
+        for box in boxes:
+            self.boxes.extend(int(value) for value in box)
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """One word in the old per-word dict layout"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = self.spans[2 * index], self.spans[2 * index + 1]
+        return {
+            "text": self.text[start:end],
+            "confidence": round(self.confidences[index], 4),
+            "bbox": self.boxes[4 * index:4 * index + 4].tolist()
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[index] for index in range(len(self)))
+
+    def to_json(self) -> Dict[str, Any]:
+        """Columnar JSON form; spans index into the text of the result holding these words"""
+        return {
+            "layout": "columnar",
+            "count": len(self),
+            "spans": self.spans.tolist(),
+            "confidence": [round(confidence, 4) for confidence in self.confidences.tolist()],
+            "bbox": self.boxes.tolist()
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], text: str) -> 'WordResults':
+        """Rebuild word results from their columnar JSON form and the text it refers to"""
+        words = cls()
+        words.text = text
+        words.spans = array('I', data["spans"])
+        words.confidences = array('f', data["confidence"])
+        words.boxes = array('i', data["bbox"])
+        return words
+
+
+def restore_words(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a result read back from JSON whose engine details are WordResults again"""
+    all_results = result.get("all_results")
+    if not isinstance(all_results, dict):
+        return result
+    restored = {}
+    for engine, engine_result in all_results.items():
+        details = engine_result.get("details")
+        if isinstance(details, dict) and details.get("layout") == "columnar":
+            engine_result = dict(engine_result, details=WordResults.from_json(details, engine_result["text"]))
+        restored[engine] = engine_result
+    return dict(result, all_results=restored)
+
+
+def words_json(details: Any) -> Optional[Dict[str, Any]]:
+    """Columnar JSON of an engine result's words, whether live, cached or missing"""
+    if isinstance(details, WordResults):
+        return details.to_json()
+    if isinstance(details, dict):
+        return details  # Cached results already hold the JSON form
+    return None
+
+
+def json_default(value):
+    """Serialize word results, numpy scalars and arrays found in OCR results"""
+    if isinstance(value, WordResults):
+        return value.to_json()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
@@ -0,0 +1,123 @@
+"""
+Pattern Bank for BharatChain
+Document classification and field extraction patterns, compiled once and matched with as few scans as possible
+"""
+
+import re
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Document type patterns, matched against lowercased text
+DOCUMENT_PATTERNS = {
+    'aadhaar': [r'\d{4}\s\d{4}\s\d{4}', r'aadhaar', r'आधार'],
+    'pan': [r'[A-Z]{5}\d{4}[A-Z]{1}', r'permanent account number', r'pan card'],
+    'passport': [r'[A-Z]\d{7}', r'passport', r'republic of india'],
+    'driving_license': [r'[A-Z]{2}\d{13}', r'driving', r'license', r'transport'],
+    'voter_id': [r'[A-Z]{3}\d{7}', r'voter', r'election', r'eci'],
+    'birth_certificate': [r'birth certificate', r'date of birth', r'registrar'],
+    'income_certificate': [r'income certificate', r'annual income', r'salary'],
+    'caste_certificate': [r'caste certificate', r'category', r'sc|st|obc'],
+    'domicile': [r'domicile', r'residence', r'permanent resident']
+}
+
+# Structured fields as (section, field, pattern), matched against the original text
+FIELD_PATTERNS = [
+    ('numbers', 'aadhaar', r'\d{4}\s?\d{4}\s?\d{4}'),
+    ('numbers', 'pan', r'[A-Z]{5}\d{4}[A-Z]{1}'),
+    ('dates', 'found_dates', r'\d{1,2}[-/]\d{1,2}[-/]\d{4}'),
+    ('dates', 'found_dates', r'\d{1,2}[-/]\d{1,2}[-/]\d{2}'),
+    ('dates', 'found_dates', r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'),
+    ('personal_info', 'names', r'(?i:Name[:\s]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*))'),
+    # The lookahead names the possible first characters, which the optional prefix would hide
+    ('numbers', 'phone', r'(?=[+6-9])(?:\+91|91)?[6-9]\d{9}'),
+    ('personal_info', 'emails', r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+]
+
+# Text-based fraud indicators, searched for in lowercased text
+SUSPICIOUS_PATTERNS = [
+    (re.compile(r'photocopy|xerox|duplicate'), 'Possible photocopy'),
+    (re.compile(r'invalid|fake|forged'), 'Contains suspicious keywords'),
+    (re.compile(r'specimen|sample|example'), 'May be a specimen document')
+]
+
+SECURITY_TERMS = re.compile(r'\b(?:secure|protected|authenticated|verified|certified)\b')
+
+# Patterns without any regex metacharacter are plain text
+LITERAL = re.compile(r'[^.^$*+?{}\[\]\\|()]+')
+
+# A leading \d or [...] class that every match must start with (not followed by ?, * or {0)
+LEADING_CLASS = re.compile(r'(\\d|\[(?:[^\]\\]|\\.)+\])(?![?*]|\{0)')
+
+
+def leading_class(pattern: str) -> Optional[str]:
+    """Character class every match of a pattern starts with, or None when it has none"""
+    match = LEADING_CLASS.match(pattern)
+    # A top-level "|" would let other alternatives start elsewhere, so any "|" is treated as one
+    if match is None or '|' in pattern:
+        return None
+    return match.group(1)
+
+
+class PatternBank:
+    """Patterns compiled once and grouped so a text is scanned as few times as possible"""
+
+    def __init__(self, patterns: Sequence[Tuple[Hashable, str]], flags: int = 0):
+        """Compile (key, pattern) pairs; several patterns may share a key"""
+        self.keys = [key for key, _ in patterns]
+        self.literals = []  # (pattern index, text) counted with str.count
+        self.singles = []  # (pattern index, compiled pattern)
+        self.alternations = []  # (compiled alternation, {group name: (pattern index, value group)})
+
+        by_class = {}
+        for index, (_, pattern) in enumerate(patterns):
+            if not flags and LITERAL.fullmatch(pattern):
+                self.literals.append((index, pattern))
+                continue
+            first = leading_class(pattern)
+            if first:
+                by_class.setdefault(first, []).append(index)
+            else:
+                self.singles.append((index, re.compile(pattern, flags)))
+
+        # Patterns starting with the same class share one alternation. The class is repeated as a
+        # lookahead in front, which lets the engine skip to candidate positions the way it does for
+        # a single pattern; without it an alternation is slower than scanning for each pattern
+        for first, indexes in by_class.items():
+            if len(indexes) == 1:
+                index = indexes[0]
+                self.singles.append((index, re.compile(f'(?={first})(?:{patterns[index][1]})', flags)))
+                continue
+            alternation = re.compile(
+                f'(?={first})(?:' + '|'.join(f'(?P<p{index}>{patterns[index][1]})' for index in indexes) + ')',
+                flags
+            )
+            values = {}
+            for index in indexes:
+                group = alternation.groupindex[f'p{index}']
+                # Like re.findall, a pattern with a group of its own yields that group
+                own_groups = re.compile(patterns[index][1], flags).groups
+                values[f'p{index}'] = (index, group + 1 if own_groups else group)
+            self.alternations.append((alternation, values))
+
+    def scan(self, text: str) -> Dict[Hashable, List[str]]:
+        """Matches per key, each pattern's in text order and a key's patterns in the order given"""
+        matches = [[] for _ in self.keys]
+        for index, literal in self.literals:
+            matches[index] = [literal] * text.count(literal)
+        for index, compiled in self.singles:
+            matches[index] = compiled.findall(text)
+        for alternation, values in self.alternations:
+            for match in alternation.finditer(text):
+                index, group = values[match.lastgroup]
+                matches[index].append(match.group(group))
+
+        found = {}
+        for key, pattern_matches in zip(self.keys, matches):
+            if pattern_matches:
+                found.setdefault(key, []).extend(pattern_matches)
+        return found
+
+
+# Compiled once when the module is imported
+TYPE_BANK = PatternBank([(doc_type, pattern) for doc_type, patterns in DOCUMENT_PATTERNS.items()
+                         for pattern in patterns])
+FIELD_BANK = PatternBank([((section, field), pattern) for section, field, pattern in FIELD_PATTERNS])
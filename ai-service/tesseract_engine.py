@@ -0,0 +1,179 @@
+"""
+Tesseract Engine for BharatChain
+Keeps Tesseract loaded in-process through tesserocr, falling back to pytesseract
+"""
+
+import os
+import queue
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+import cv2
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # Optional: needs libtesseract and its Python binding
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# Language(s) loaded by Tesseract, in its own "eng+hin" notation
+TESSERACT_LANG = os.environ.get('OCR_TESSERACT_LANG', 'eng')
+# "auto" prefers the in-process API, "subprocess" always runs the tesseract binary
+TESSERACT_BACKEND = os.environ.get('OCR_TESSERACT_BACKEND', 'auto')
+# Loaded API instances kept for reuse (0 means one per CPU)
+TESSERACT_INSTANCES = int(os.environ.get('OCR_TESSERACT_INSTANCES', '0'))
+
+
+class TesseractEngine:
+    """Tesseract runner that reuses loaded API instances instead of spawning a process per call"""
+
+    def __init__(self, lang: Optional[str] = None, backend: Optional[str] = None,
+                 instances: Optional[int] = None):
+        """Pick the backend and check that Tesseract can run"""
+        self.lang = lang or TESSERACT_LANG
+        self.max_instances = instances or TESSERACT_INSTANCES or os.cpu_count() or 1
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.backend = None
+        self.osd_api = None
+        self.osd_lock = threading.Lock()
+        self.osd_available = False
+
+        backend = backend or TESSERACT_BACKEND
+        if backend != 'subprocess' and tesserocr is not None:
+            try:
+                # Load one instance up front so broken tessdata shows up at startup
+                self.idle.put(self._create_api())
+                self.created = 1
+                self.backend = 'tesserocr'
+            except Exception as e:
+                logger.warning(f"⚠️ In-process Tesseract unavailable, using subprocess: {e}")
+
+        if self.backend is None:
+            pytesseract.get_tesseract_version()  # Raises when the binary is missing
+            self.backend = 'pytesseract'
+        self._init_osd()
+
+    def _init_osd(self):
+        """Check for the orientation and script detection model"""
+        try:
+            if self.backend == 'tesserocr':
+                self.osd_api = tesserocr.PyTessBaseAPI(lang='osd', psm=tesserocr.PSM.OSD_ONLY)
+                self.osd_available = True
+            else:
+                self.osd_available = 'osd' in pytesseract.get_languages(config='')
+        except Exception as e:
+            logger.info(f"Tesseract orientation detection unavailable: {e}")
+            self.osd_available = False
+
+    def _create_api(self):
+        """Load a new TessBaseAPI with the configured languages"""
+        return tesserocr.PyTessBaseAPI(lang=self.lang, psm=tesserocr.PSM.AUTO)
+
+    def _acquire_api(self):
+        """Take an idle API instance, loading a new one while under the limit"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            can_create = self.created < self.max_instances
+            if can_create:
+                self.created += 1
+        if not can_create:
+            return self.idle.get()
+        try:
+            return self._create_api()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def image_to_data(self, image: np.ndarray) -> Dict[str, List[Any]]:
+        """Word-level results in pytesseract's Output.DICT layout"""
+        if self.backend == 'pytesseract':
+            return pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        data = {"text": [], "conf": [], "left": [], "top": [], "width": [], "height": []}
+        api = self._acquire_api()
+        try:
+            api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            api.Recognize()
+            iterator = api.GetIterator()
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(iterator, level) if iterator else []:
+                box = word.BoundingBox(level)
+                if box is None:
+                    continue
+                x0, y0, x1, y1 = box
+                data["text"].append(word.GetUTF8Text(level) or "")
+                data["conf"].append(word.Confidence(level))
+                data["left"].append(x0)
+                data["top"].append(y0)
+                data["width"].append(x1 - x0)
+                data["height"].append(y1 - y0)
+        finally:
+            api.Clear()
+            self.idle.put(api)
+        return data
+
+    def detect_orientation(self, image: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Clockwise rotation that makes a grayscale page upright, from Tesseract's OSD"""
+        if not self.osd_available:
+            return None
+        try:
+            if self.backend == 'pytesseract':
+                osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+                return {"rotate": int(osd["rotate"]), "confidence": float(osd["orientation_conf"])}
+
+            image = np.ascontiguousarray(image)
+            height, width = image.shape
+            with self.osd_lock:
+                self.osd_api.SetImageBytes(image.tobytes(), width, height, 1, width)
+                osd = self.osd_api.DetectOrientationScript()
+                self.osd_api.Clear()
+            if not osd:
+                return None
+            # Tesseract reports the text's orientation; the fix turns it back the other way
+            return {"rotate": (360 - int(osd["orient_deg"])) % 360, "confidence": float(osd["orient_conf"])}
+        except Exception as e:
+            # Pages with too little text cannot be oriented
+            logger.debug(f"Orientation detection failed: {e}")
+            return None
+
+    def get_status(self) -> Dict[str, Any]:
+        """Backend in use and loaded instances"""
+        with self.lock:
+            created = self.created
+        return {
+            "backend": self.backend,
+            "lang": self.lang,
+            "orientation_detection": self.osd_available,
+            "loaded_instances": created,
+            "max_instances": self.max_instances
+        }
+
+
+# Engine shared by everything in the process that runs Tesseract
+tesseract_engine = None
+_tesseract_engine_lock = threading.Lock()
+
+
+def get_tesseract_engine() -> TesseractEngine:
+    """Get the process-wide Tesseract engine, raising when Tesseract cannot run"""
+    global tesseract_engine
+    with _tesseract_engine_lock:
+        if tesseract_engine is None:
+            tesseract_engine = TesseractEngine()
+    return tesseract_engine